@@ -14,6 +14,7 @@ DESCRIÇÃO:
 CARACTERÍSTICAS:
     - Carrega credenciais de forma segura através de variáveis de ambiente
     - Cria conexão ao servidor MySQL (sem banco específico)
+    - Mantém um pool de conexões reutilizáveis, com verificação (pre-ping)
     - Fornece função de teste de conectividade
     - Utiliza SQLAlchemy para abstração do banco de dados
 
@@ -48,6 +49,10 @@ DB_PORT = os.getenv('DB_PORT')          # Ex: 3306 (porta padrão do MySQL)
 DB_USER = os.getenv('DB_USER')          # Usuário do banco de dados
 DB_PASSWORD = os.getenv('DB_PASSWORD')  # Senha do usuário
 
+# Parâmetros opcionais do pool de conexões (valores padrão se ausentes no .env)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))   # Conexões mantidas abertas
+DB_TIMEOUT = int(os.getenv('DB_TIMEOUT', 30))       # Espera máxima por conexão (s)
+
 # ============================================================================
 # CONSTRUÇÃO DA URL DE CONEXÃO
 # ============================================================================
@@ -56,12 +61,35 @@ DB_PASSWORD = os.getenv('DB_PASSWORD')  # Senha do usuário
 # O banco específico será selecionado nas queries através do template Jinja2
 DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}"
 
+# Mesma conexão no formato esperado pelo leitor opcional connectorx
+# (ETL_LEITOR_SQL=connectorx), que fala o protocolo MySQL sem o PyMySQL
+DATABASE_URL_CONNECTORX = f"mysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}"
+
 # ============================================================================
 # CRIAÇÃO DO ENGINE SQLALCHEMY
 # ============================================================================
 # Engine: objeto que gerencia as conexões com o banco de dados
 # echo=False: desabilita logs verbosos do SQLAlchemy (deixa logs mais limpos)
-engine = create_engine(DATABASE_URL, echo=False)
+#
+# Pool de conexões (QueuePool): as conexões são reaproveitadas entre as
+# execuções do ETL em vez de abrir uma nova conexão TCP/autenticação a cada
+# consulta.
+#   - pool_size / max_overflow: conexões permanentes e extras sob demanda
+#   - pool_timeout: tempo máximo de espera por uma conexão livre
+#   - pool_recycle: renova conexões antes do wait_timeout do MySQL derrubá-las
+#   - pool_pre_ping: testa a conexão antes do uso, evitando erros por
+#     conexões ociosas que o servidor já encerrou
+#   - charset utf8mb4: suporte completo a Unicode nos nomes vindos do banco
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=20,
+    pool_timeout=DB_TIMEOUT,
+    pool_recycle=1800,
+    pool_pre_ping=True,
+    connect_args={'charset': 'utf8mb4'}
+)
 
 # ============================================================================
 # CONFIGURAÇÃO DA SESSÃO (PARA USO FUTURO)
@@ -13,7 +13,8 @@ DESCRIÇÃO:
 
 ARQUITETURA:
     - Uma única query SQL extrai dados no nível mais granular (por vendedor)
-    - Pandas realiza todas as agregações necessárias em memória
+    - Pandas agrega vendedores em PDVs; as demais visões são somadas a partir
+      de uma única matriz NumPy com as métricas dos PDVs
     - Gera 7 arquivos CSV com diferentes níveis de agregação
 
 VISÕES GERADAS:
@@ -24,9 +25,23 @@ VISÕES GERADAS:
     5. visao_marca.csv     - Agregado por marca de veículo
     6. visao_setor.csv     - Agregado por setor comercial
     7. visao_nacional.csv  - Totais consolidados
+    
+    As visões 2 a 7 também podem ser gravadas em Parquet (.parquet), com
+    tipos preservados, para leitura programática mais rápida. O relatório
+    lê o Parquet no lugar do CSV sempre que ele existe.
+
+BOAS PRÁTICAS PARA NOVAS AGREGAÇÕES:
+    - groupby sobre colunas 'category' sempre com observed=True (o padrão
+      gera o produto cartesiano de todas as categorias)
+    - sort=False quando a ordem das linhas do resultado não é usada
+    - dropna=False para não descartar grupos com chave nula dos totais
+    - Visões derivadas do PDV: preferir _agregar_por_coluna sobre a matriz
+      NumPy a um novo groupby
 
 DEPENDÊNCIAS:
     - pandas: Processamento e agregação de dados
+    - numpy: Agregação vetorizada das visões derivadas do PDV
+    - pyarrow: Escrita rápida dos arquivos CSV e dos arquivos Parquet
     - jinja2: Template SQL dinâmico
     - sqlalchemy: Execução de queries
     - python-dotenv: Variáveis de ambiente
@@ -37,13 +52,23 @@ DEPENDÊNCIAS:
 # IMPORTAÇÕES
 # ============================================================================
 import os
+import re
+import atexit
 import logging
+from logging.handlers import MemoryHandler
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+import numpy as np
 import pandas as pd
-from jinja2 import Template
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+from jinja2 import Environment, FileSystemLoader, Template
 from sqlalchemy import text
+from sqlalchemy.dialects import mysql
 from dotenv import load_dotenv
-from config.connection_db import engine
+from config.connection_db import engine, DATABASE_URL_CONNECTORX
 
 # ============================================================================
 # CONFIGURAÇÃO DE CAMINHOS E AMBIENTE
@@ -60,6 +85,77 @@ CONFIG_DIR = BASE_DIR.parent / "config"             # Pasta config/
 #       apontando para uma pasta temporária
 output_dir = BASE_DIR.parent / "output" / "csv"
 
+# Pastas já criadas neste processo (ver _garantir_pasta)
+_PASTAS_PREPARADAS: set = set()
+
+# Número de linhas lidas do banco por lote durante a extração
+TAMANHO_LOTE = 50_000
+
+# Formatos aceitos para as visões agregadas (parâmetro `formato` do ETL)
+FORMATOS_SAIDA = ("csv", "parquet", "ambos")
+
+# Arquivos CSV que recebem o BOM UTF-8 (abertos diretamente no Excel)
+# As visões menores são gravadas em UTF-8 puro
+_BOM_VIEWS = {"visao_vendedor.csv", "visao_pdv.csv"}
+
+# Caracteres que obrigam um campo de texto do CSV a ficar entre aspas
+_PADRAO_ASPAS = '[,"\r\n]'
+
+# Quebra de linha dos CSVs: a do sistema, como no to_csv do pandas
+_QUEBRA_LINHA = os.linesep
+
+# Leitor usado por run_query:
+#   - 'sqlalchemy' (padrão): pandas + SQLAlchemy + PyMySQL
+#   - 'connectorx': connectorx, que lê o resultado do MySQL direto para
+#     colunas Arrow em C++ (dependência opcional: pip install connectorx)
+LEITOR_SQL = os.getenv("ETL_LEITOR_SQL", "sqlalchemy").lower()
+
+# Ambiente Jinja2 compartilhado pelos templates SQL da pasta etl/
+# - autoescape=False: o template é SQL puro, não HTML
+# - auto_reload=False: o arquivo não muda durante a execução, então o
+#   cache não verifica o mtime a cada get_template
+# - cache_size: templates SQL adicionados no futuro compartilham o cache
+_JINJA_ENV = Environment(
+    loader=FileSystemLoader(BASE_DIR),
+    autoescape=False,
+    auto_reload=False,
+    cache_size=32,
+)
+
+# Template SQL lido e compilado uma única vez, na importação do módulo;
+# cada chamada do ETL apenas renderiza o template já compilado
+_QUERY_TEMPLATE = _JINJA_ENV.get_template("query.sql")
+
+# ============================================================================
+# ORDEM DAS COLUNAS NAS VISÕES
+# ============================================================================
+# Métricas agregadas, na ordem em que aparecem em TODOS os arquivos CSV
+METRICAS = (
+    'qtd_vendedores',                    # Contador de vendedores
+    'qtd_leads',                         # Total de leads cadastrados
+    'leads_visualizado',                 # Leads visualizados pelo vendedor
+    'convite_enviado',                   # Convites enviados
+    'convite_pendente_confirmacao',      # Convites aguardando resposta
+    'convite_declinado_confirmacao',     # Convites declinados
+    'convite_confirmado',                # Convites confirmados
+    'presenca',                          # Presenças no evento
+    'testdrive',                         # Test-drives realizados
+    'venda'                              # Vendas concretizadas
+)
+
+# Ordem final de cada visão: coluna identificadora, colunas de contexto e
+# métricas. Como os conjuntos de colunas são conhecidos de antemão, a ordem
+# é montada uma única vez aqui, e não a cada chamada de reorganizar_colunas
+# ORDEM_VENDEDOR é aplicada no próprio SELECT do query.sql e fica aqui como
+# referência (mantenha as duas em sincronia)
+ORDEM_VENDEDOR = ('nome_comercial', 'rid', 'sid', 'grupo', 'marca', 'pdv',
+                  'prospector_id', *METRICAS)
+ORDEM_PDV = ('pdv', 'rid', 'sid', 'grupo', 'marca', *METRICAS)
+ORDEM_REGIONAL = ('rid', *METRICAS)
+ORDEM_GRUPO = ('grupo', *METRICAS)
+ORDEM_MARCA = ('marca', *METRICAS)
+ORDEM_SETOR = ('sid', *METRICAS)
+
 # ============================================================================
 # CONFIGURAÇÃO DO SISTEMA DE LOGGING
 # ============================================================================
@@ -78,6 +174,8 @@ def setup_logging():
         - Registra em modo append (preserva logs anteriores)
         - Formato: YYYY-MM-DD HH:MM:SS - LEVEL - Mensagem
         - Evita duplicação de handlers
+        - Agrupa os registros em memória (MemoryHandler) e grava no arquivo
+          a cada 128 registros, em qualquer ERROR ou ao encerrar o processo
     """
     # Define pasta e arquivo de log
     log_dir = BASE_DIR.parent / "logs"
@@ -100,7 +198,12 @@ def setup_logging():
     
     # Adiciona handler apenas se ainda não existir (evita duplicação)
     if not logger.handlers:
-        logger.addHandler(file_handler)
+        # Bufferiza os registros para não pagar um write+flush por chamada
+        memory_handler = MemoryHandler(
+            capacity=128, flushLevel=logging.ERROR, target=file_handler
+        )
+        logger.addHandler(memory_handler)
+        atexit.register(memory_handler.flush)
     
     return logger
 
@@ -141,33 +244,53 @@ def get_eventos() -> list:
             'end_date': '31/08/2024'
         }
     """
-    logger.info("Lendo arquivo de mapeamento de eventos: config/eventos_db.csv")
     eventos_path = CONFIG_DIR / "eventos_db.csv"
     
     try:
-        # Lê o arquivo CSV com pandas
-        df_eventos = pd.read_csv(eventos_path)
-        
-        # Valida se o arquivo não está vazio
-        if df_eventos.empty:
-            raise ValueError("O arquivo config/eventos_db.csv está vazio.")
-        
-        # Valida se todas as colunas obrigatórias existem
-        colunas_obrigatorias = ['db_name', 'event_name', 'start_date', 'end_date']
-        for coluna in colunas_obrigatorias:
-            if coluna not in df_eventos.columns:
-                raise ValueError(
-                    f"Coluna obrigatória '{coluna}' não encontrada no arquivo eventos_db.csv"
-                )
-        
-        # Converte DataFrame para lista de dicionários
-        return df_eventos.to_dict('records')
-        
+        # A chave do cache é o mtime do arquivo: edições no CSV invalidam a
+        # entrada e forçam uma nova leitura
+        mtime = eventos_path.stat().st_mtime
     except FileNotFoundError:
-        logger.error(f"Arquivo de mapeamento de eventos '{eventos_path}' não encontrado.")
+        logger.error("Arquivo de mapeamento de eventos '%s' não encontrado.", eventos_path)
         raise
+    
+    # Cópias rasas para que o chamador não altere os registros em cache
+    return [dict(evento) for evento in _ler_eventos(mtime)]
 
-def executar_etl(db_evento_selecionado: str, data_inicio: str, data_fim: str):
+@lru_cache(maxsize=4)
+def _ler_eventos(mtime: float) -> tuple:
+    """
+    Lê e valida o eventos_db.csv (memoizado por mtime em get_eventos).
+    
+    Args:
+        mtime (float): st_mtime do arquivo, usado apenas como chave do cache
+    
+    Returns:
+        tuple[dict]: Registros do arquivo, já validados
+    """
+    logger.info("Lendo arquivo de mapeamento de eventos: config/eventos_db.csv")
+    eventos_path = CONFIG_DIR / "eventos_db.csv"
+    
+    # Todas as colunas são texto: dtype=str dispensa a inferência de tipos
+    df_eventos = pd.read_csv(eventos_path, dtype=str, engine='c')
+    
+    # Valida se o arquivo não está vazio
+    if df_eventos.empty:
+        raise ValueError("O arquivo config/eventos_db.csv está vazio.")
+    
+    # Valida se todas as colunas obrigatórias existem
+    colunas_obrigatorias = ['db_name', 'event_name', 'start_date', 'end_date']
+    for coluna in colunas_obrigatorias:
+        if coluna not in df_eventos.columns:
+            raise ValueError(
+                f"Coluna obrigatória '{coluna}' não encontrada no arquivo eventos_db.csv"
+            )
+    
+    # Converte DataFrame para tupla (imutável) de dicionários
+    return tuple(df_eventos.to_dict('records'))
+
+def executar_etl(db_evento_selecionado: str, data_inicio: str, data_fim: str,
+                 formato: str = "csv"):
     """
     Função principal do ETL: executa a query e gera todos os arquivos CSV.
     
@@ -176,7 +299,7 @@ def executar_etl(db_evento_selecionado: str, data_inicio: str, data_fim: str):
     2. Executa a query no banco de dados
     3. Gera o arquivo mestre (visao_vendedor.csv)
     4. Realiza agregações para gerar as demais visões
-    5. Salva todos os arquivos CSV na pasta output/
+    5. Salva todos os arquivos (CSV e/ou Parquet) na pasta output/
     
     Args:
         db_evento_selecionado (str): Nome do banco de dados do evento
@@ -185,9 +308,15 @@ def executar_etl(db_evento_selecionado: str, data_inicio: str, data_fim: str):
             Ex: '2024-08-01'
         data_fim (str): Data final no formato YYYY-MM-DD
             Ex: '2024-08-31'
+        formato (str): Formato das visões agregadas, um de FORMATOS_SAIDA
+            - 'csv': apenas CSV (padrão)
+            - 'parquet': apenas Parquet (binário colunar, Snappy)
+            - 'ambos': Parquet e CSV
+            A visão vendedor é sempre gravada em CSV (usada no Excel)
     
     Raises:
-        ValueError: Se a consulta não retornar nenhum registro
+        ValueError: Se a consulta não retornar nenhum registro ou se o
+            formato for inválido
     
     Example:
         >>> executar_etl('dexp_ram_agosto', '2024-08-01', '2024-08-31')
@@ -197,7 +326,8 @@ def executar_etl(db_evento_selecionado: str, data_inicio: str, data_fim: str):
     
     Fluxo de Execução:
         1. PREPARAÇÃO: Carrega template e prepara contexto
-        2. EXTRAÇÃO: Executa query SQL e obtém dados brutos
+        2. EXTRAÇÃO: Lê o resultado da query em lotes, gravando a visão
+           vendedor e acumulando a visão PDV a cada lote
         3. TRANSFORMAÇÃO: Realiza agregações em diferentes níveis
         4. CARGA: Salva 7 arquivos CSV
     """
@@ -207,182 +337,201 @@ def executar_etl(db_evento_selecionado: str, data_inicio: str, data_fim: str):
     logger.info("="*50)
     logger.info("INÍCIO DO PROCESSO DE ETL.")
     
-    # Carrega o template SQL (query.sql)
+    if formato not in FORMATOS_SAIDA:
+        raise ValueError(
+            f"Formato de saída '{formato}' inválido. Use um de: {', '.join(FORMATOS_SAIDA)}"
+        )
+    
+    # Cria a pasta de saída (uma única vez por processo) antes da extração
+    _garantir_pasta(output_dir)
+    
+    # Obtém o template SQL (query.sql), já compilado na importação
     query_template = load_query_template()
     
     # Prepara o contexto para renderização do template Jinja2
     # Estes valores substituirão os placeholders {{}} no arquivo SQL
+    # (apenas identificadores, que não podem ser parâmetros de bind)
     context = {
         "DB_PDV": os.getenv("MYSQL_DB_PDV"),      # Banco de dados de PDVs
         "DB_EVENTO": db_evento_selecionado,        # Banco do evento selecionado
-        "DATA_INICIO": f"'{data_inicio}'",         # Data inicial (com aspas para SQL)
-        "DATA_FIM": f"'{data_fim}'"                # Data final (com aspas para SQL)
     }
-    logger.info(f"Contexto de Execução do ETL: {context}")
     
-    # ========================================================================
-    # FASE 2: EXTRAÇÃO
-    # ========================================================================
+    # Parâmetros de bind (:data_inicio / :data_fim no arquivo SQL)
+    # Enviados separadamente ao banco: sem aspas manuais nem risco de SQL
+    # injection, e o texto da query fica idêntico entre períodos diferentes
+    params = {
+        "data_inicio": data_inicio,                # Data inicial (YYYY-MM-DD)
+        "data_fim": data_fim                       # Data final (YYYY-MM-DD)
+    }
+    logger.info("Contexto de Execução do ETL: %s | Parâmetros: %s", context, params)
+    
+    # Define as métricas que serão agregadas (ordem fixa de METRICAS)
+    metricas = list(METRICAS)
+    colunas_pdv = ['rid', 'sid', 'grupo', 'marca', 'pdv']
+    
     # Renderiza o template SQL substituindo os placeholders pelos valores reais
     sql_final = query_template.render(**context)
     
-    # Executa a query e obtém os dados no nível mais granular (por vendedor)
-    # fillna(0) substitui valores nulos por zero para evitar problemas nas agregações
-    df_vendedor = run_query(sql_final).fillna(0)
-    
-    # Valida se a consulta retornou dados
-    if df_vendedor.empty:
-        logger.warning("A consulta não retornou nenhum dado. O processo de ETL será interrompido.")
-        raise ValueError("A consulta principal do ETL não retornou nenhum registro.")
+    # Pool de threads para as escritas de CSV: o writer do PyArrow libera
+    # o GIL, então a serialização/I/O de um arquivo se sobrepõe às agregações
+    # e às demais escritas. Os lotes da visão vendedor vão para um pool de
+    # uma única thread, que preserva a ordem de escrita no arquivo.
+    # O bloco with aguarda todas as threads ao sair.
+    escritas = {}
+    with ThreadPoolExecutor(max_workers=6) as executor, \
+            ThreadPoolExecutor(max_workers=1) as escritor_vendedor:
+        # ====================================================================
+        # FASE 2: EXTRAÇÃO EM LOTES + CARGA DA VISÃO VENDEDOR (ARQUIVO MESTRE)
+        # ====================================================================
+        # O resultado da query é lido em lotes de TAMANHO_LOTE linhas. Cada
+        # lote é gravado no arquivo mestre e agregado por PDV enquanto o
+        # próximo ainda está sendo lido, então a memória depende do número
+        # de PDVs, e não do número de vendedores.
+        caminho_vendedor = output_dir / "visao_vendedor.csv"
+        escritas_vendedor = []
+        df_pdv_acumulado = None
+        total_registros = 0
+        
+        for lote in run_query(sql_final, params, chunksize=TAMANHO_LOTE):
+            if lote.empty:
+                continue
+            lote = _preparar_lote(lote, metricas)
+            
+            # Visão mais detalhada: uma linha por vendedor com suas métricas
+            # O SELECT do query.sql já devolve as colunas em ORDEM_VENDEDOR,
+            # então o lote é gravado sem reordenação
+            escritas_vendedor.append(escritor_vendedor.submit(
+                _salvar_csv, lote, caminho_vendedor,
+                anexar=total_registros > 0
+            ))
+            total_registros += len(lote)
+            
+            # Agregação parcial por PDV, combinada com o acumulado até aqui
+            # observed=True: agrupa apenas as combinações de categorias presentes
+            # nos dados (o padrão geraria o produto cartesiano das categorias)
+            # dropna=False: chaves nulas formam um grupo próprio, então nenhum
+            # vendedor deixa de ser contabilizado nos totais
+            # sort=False: não ordena a cada lote; o resultado final é ordenado
+            # uma única vez, na fase 3
+            df_pdv_parcial = lote.groupby(
+                colunas_pdv, observed=True, dropna=False, sort=False
+            )[metricas].sum()
+            if df_pdv_acumulado is None:
+                df_pdv_acumulado = df_pdv_parcial
+            else:
+                df_pdv_acumulado = pd.concat(
+                    [df_pdv_acumulado, df_pdv_parcial]
+                ).groupby(
+                    level=colunas_pdv, observed=True, dropna=False, sort=False
+                ).sum()
+        
+        # Valida se a consulta retornou dados
+        if total_registros == 0:
+            logger.warning("A consulta não retornou nenhum dado. O processo de ETL será interrompido.")
+            raise ValueError("A consulta principal do ETL não retornou nenhum registro.")
+        
+        logger.info("Visão mestre 'visao_vendedor' montada com %s registros.", total_registros)
 
-    # ========================================================================
-    # FASE 3: PREPARAÇÃO PARA TRANSFORMAÇÃO
-    # ========================================================================
-    # Cria pasta de saída se não existir
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Define as métricas que serão agregadas
-    # IMPORTANTE: Esta ordem é mantida consistente em todos os arquivos
-    metricas = [
-        'qtd_vendedores',                    # Contador de vendedores
-        'qtd_leads',                         # Total de leads cadastrados
-        'leads_visualizado',                 # Leads visualizados pelo vendedor
-        'convite_enviado',                   # Convites enviados
-        'convite_pendente_confirmacao',      # Convites aguardando resposta
-        'convite_declinado_confirmacao',     # Convites declinados
-        'convite_confirmado',                # Convites confirmados
-        'presenca',                          # Presenças no evento
-        'testdrive',                         # Test-drives realizados
-        'venda'                              # Vendas concretizadas
-    ]
-    
-    # ========================================================================
-    # FASE 4: TRANSFORMAÇÃO E CARGA - VISÃO VENDEDOR (ARQUIVO MESTRE)
-    # ========================================================================
-    # Esta é a visão mais detalhada, servindo de base para todas as outras
-    # Mantém uma linha por vendedor com todas as suas métricas
-    df_vendedor_reorganizado = reorganizar_colunas(
-        df_vendedor, 
-        'nome_comercial',  # Primeira coluna: nome do vendedor
-        ['rid', 'sid', 'grupo', 'marca', 'pdv', 'prospector_id']  # Colunas de contexto
-    )
+        # ====================================================================
+        # FASE 3: TRANSFORMAÇÃO E CARGA - VISÃO PDV
+        # ====================================================================
+        # Soma de todas as métricas dos vendedores de cada PDV, acumulada
+        # lote a lote na fase anterior
+        df_pdv = df_pdv_acumulado.reset_index()
+        
+        # Tipos fixos para as chaves: com um único lote elas ainda estão em
+        # 'category', com vários o concat já as converteu; sem isto o
+        # schema do Parquet dependeria da quantidade de lotes
+        _tipar_chaves(df_pdv, colunas_pdv)
+        
+        # Ordena pelas chaves, como o groupby padrão (sort=True) fazia, para
+        # que as linhas dos CSVs saiam na mesma ordem de antes
+        df_pdv = df_pdv.sort_values(colunas_pdv, ignore_index=True)
     
-    # Salva em CSV
-    # encoding='utf-8-sig': Adiciona BOM (Byte Order Mark) para compatibilidade com Excel
-    # index=False: Não salva o índice do DataFrame como coluna
-    df_vendedor_reorganizado.to_csv(
-        output_dir / "visao_vendedor.csv", 
-        index=False, 
-        encoding='utf-8-sig'
-    )
-    logger.info("Visão mestre 'visao_vendedor' salva (primeira coluna: nome_comercial).")
-
-    # ========================================================================
-    # FASE 5: TRANSFORMAÇÃO E CARGA - VISÃO PDV
-    # ========================================================================
-    # Agrega dados por PDV/concessionária
-    # Soma todas as métricas dos vendedores de cada PDV
-    colunas_pdv = ['rid', 'sid', 'grupo', 'marca', 'pdv']
-    df_pdv = df_vendedor.groupby(colunas_pdv, as_index=False)[metricas].sum()
+        # Matriz contígua com as métricas dos PDVs, extraída uma única vez e
+        # reutilizada por todas as agregações seguintes (fases 4 a 8)
+        # Os acumuladores usam int64 para que os totais regionais/nacionais
+        # não corram risco de overflow
+        matriz_pdv = df_pdv[metricas].to_numpy(dtype=np.int64)
     
-    # Reorganiza para que 'pdv' seja a primeira coluna
-    df_pdv_reorganizado = reorganizar_colunas(
-        df_pdv, 
-        'pdv',  # Primeira coluna: nome do PDV
-        ['rid', 'sid', 'grupo', 'marca']  # Colunas de contexto
-    )
+        # Reorganiza para que 'pdv' seja a primeira coluna
+        df_pdv_reorganizado = reorganizar_colunas(df_pdv, ORDEM_PDV)
     
-    df_pdv_reorganizado.to_csv(
-        output_dir / "visao_pdv.csv", 
-        index=False, 
-        encoding='utf-8-sig'
-    )
-    logger.info("Visão agregada 'visao_pdv' salva (primeira coluna: pdv).")
+        _agendar_escrita(executor, escritas, df_pdv_reorganizado, "visao_pdv", formato)
 
-    # ========================================================================
-    # FASE 6: TRANSFORMAÇÃO E CARGA - VISÃO REGIONAL
-    # ========================================================================
-    # Agrega dados por região geográfica
-    # Soma todas as métricas dos PDVs de cada região
-    df_regional = df_pdv.groupby('rid', as_index=False)[metricas].sum()
+        # ====================================================================
+        # FASE 4: TRANSFORMAÇÃO E CARGA - VISÃO REGIONAL
+        # ====================================================================
+        # Agrega dados por região geográfica
+        # Soma todas as métricas dos PDVs de cada região
+        df_regional = _agregar_por_coluna(df_pdv, matriz_pdv, 'rid', metricas)
     
-    # Reorganiza para que 'rid' (regional ID) seja a primeira coluna
-    df_regional_reorganizado = reorganizar_colunas(df_regional, 'rid')
+        # Reorganiza para que 'rid' (regional ID) seja a primeira coluna
+        df_regional_reorganizado = reorganizar_colunas(df_regional, ORDEM_REGIONAL)
     
-    df_regional_reorganizado.to_csv(
-        output_dir / "visao_regional.csv", 
-        index=False, 
-        encoding='utf-8-sig'
-    )
-    logger.info("Visão agregada 'visao_regional' salva (primeira coluna: rid).")
+        _agendar_escrita(executor, escritas, df_regional_reorganizado, "visao_regional", formato)
 
-    # ========================================================================
-    # FASE 7: TRANSFORMAÇÃO E CARGA - VISÃO GRUPO
-    # ========================================================================
-    # Agrega dados por grupo empresarial
-    # Soma todas as métricas dos PDVs de cada grupo
-    df_grupo = df_pdv.groupby('grupo', as_index=False)[metricas].sum()
+        # ====================================================================
+        # FASE 5: TRANSFORMAÇÃO E CARGA - VISÃO GRUPO
+        # ====================================================================
+        # Agrega dados por grupo empresarial
+        # Soma todas as métricas dos PDVs de cada grupo
+        df_grupo = _agregar_por_coluna(df_pdv, matriz_pdv, 'grupo', metricas)
     
-    # Reorganiza para que 'grupo' seja a primeira coluna
-    df_grupo_reorganizado = reorganizar_colunas(df_grupo, 'grupo')
+        # Reorganiza para que 'grupo' seja a primeira coluna
+        df_grupo_reorganizado = reorganizar_colunas(df_grupo, ORDEM_GRUPO)
     
-    df_grupo_reorganizado.to_csv(
-        output_dir / "visao_grupo.csv", 
-        index=False, 
-        encoding='utf-8-sig'
-    )
-    logger.info("Visão agregada 'visao_grupo' salva (primeira coluna: grupo).")
+        _agendar_escrita(executor, escritas, df_grupo_reorganizado, "visao_grupo", formato)
 
-    # ========================================================================
-    # FASE 8: TRANSFORMAÇÃO E CARGA - VISÃO MARCA
-    # ========================================================================
-    # Agrega dados por marca de veículo
-    # Soma todas as métricas dos PDVs de cada marca
-    df_marca = df_pdv.groupby('marca', as_index=False)[metricas].sum()
+        # ====================================================================
+        # FASE 6: TRANSFORMAÇÃO E CARGA - VISÃO MARCA
+        # ====================================================================
+        # Agrega dados por marca de veículo
+        # Soma todas as métricas dos PDVs de cada marca
+        df_marca = _agregar_por_coluna(df_pdv, matriz_pdv, 'marca', metricas)
     
-    # Reorganiza para que 'marca' seja a primeira coluna
-    df_marca_reorganizado = reorganizar_colunas(df_marca, 'marca')
+        # Reorganiza para que 'marca' seja a primeira coluna
+        df_marca_reorganizado = reorganizar_colunas(df_marca, ORDEM_MARCA)
     
-    df_marca_reorganizado.to_csv(
-        output_dir / "visao_marca.csv", 
-        index=False, 
-        encoding='utf-8-sig'
-    )
-    logger.info("Visão agregada 'visao_marca' salva (primeira coluna: marca).")
+        _agendar_escrita(executor, escritas, df_marca_reorganizado, "visao_marca", formato)
     
-    # ========================================================================
-    # FASE 9: TRANSFORMAÇÃO E CARGA - VISÃO SETOR
-    # ========================================================================
-    # Agrega dados por setor comercial
-    # Soma todas as métricas dos PDVs de cada setor
-    df_setor = df_pdv.groupby('sid', as_index=False)[metricas].sum()
+        # ====================================================================
+        # FASE 7: TRANSFORMAÇÃO E CARGA - VISÃO SETOR
+        # ====================================================================
+        # Agrega dados por setor comercial
+        # Soma todas as métricas dos PDVs de cada setor
+        df_setor = _agregar_por_coluna(df_pdv, matriz_pdv, 'sid', metricas)
     
-    # Reorganiza para que 'sid' (setor ID) seja a primeira coluna
-    df_setor_reorganizado = reorganizar_colunas(df_setor, 'sid')
+        # Reorganiza para que 'sid' (setor ID) seja a primeira coluna
+        df_setor_reorganizado = reorganizar_colunas(df_setor, ORDEM_SETOR)
     
-    df_setor_reorganizado.to_csv(
-        output_dir / "visao_setor.csv", 
-        index=False, 
-        encoding='utf-8-sig'
-    )
-    logger.info("Visão agregada 'visao_setor' salva (primeira coluna: sid).")
+        _agendar_escrita(executor, escritas, df_setor_reorganizado, "visao_setor", formato)
 
-    # ========================================================================
-    # FASE 10: TRANSFORMAÇÃO E CARGA - VISÃO NACIONAL
-    # ========================================================================
-    # Agrega TODOS os dados em uma única linha com totais consolidados
-    # Soma todas as métricas de todos os PDVs
-    # .sum(): Soma cada coluna
-    # .to_frame(): Converte Series em DataFrame
-    # .T: Transpõe (transforma colunas em linha)
-    df_nacional = df_pdv[metricas].sum().to_frame().T
-    
-    df_nacional.to_csv(
-        output_dir / "visao_nacional.csv", 
-        index=False, 
-        encoding='utf-8-sig'
-    )
-    logger.info("Visão agregada 'visao_nacional' salva.")
+        # ====================================================================
+        # FASE 8: TRANSFORMAÇÃO E CARGA - VISÃO NACIONAL
+        # ====================================================================
+        # Agrega TODOS os dados em uma única linha com totais consolidados
+        # Soma as linhas da matriz de métricas dos PDVs (keepdims mantém o
+        # formato 1 x N, que vira diretamente um DataFrame de uma linha, sem
+        # Series intermediária nem transposição). As colunas saem em int64,
+        # o mesmo tipo da matriz, nunca em object como no antigo to_frame().T
+        df_nacional = pd.DataFrame(
+            matriz_pdv.sum(axis=0, keepdims=True), columns=metricas
+        )
+    
+        _agendar_escrita(executor, escritas, df_nacional, "visao_nacional", formato)
+    
+        # ====================================================================
+        # FASE 9: CONCLUSÃO DAS ESCRITAS
+        # ====================================================================
+        # Aguarda todas as escritas terminarem; result() propaga qualquer erro
+        # de I/O ocorrido nas threads
+        for escrita in escritas_vendedor:
+            escrita.result()
+        logger.info("Visão 'visao_vendedor' salva.")
+        for nome_arquivo, escrita in escritas.items():
+            escrita.result()
+            logger.info("Arquivo '%s' salvo.", nome_arquivo)
     
     # ========================================================================
     # CONCLUSÃO DO ETL
@@ -396,10 +545,11 @@ def executar_etl(db_evento_selecionado: str, data_inicio: str, data_fim: str):
 
 def load_query_template() -> Template:
     """
-    Carrega o conteúdo do arquivo SQL como um template Jinja2.
+    Retorna o conteúdo do arquivo SQL como um template Jinja2.
     
     O arquivo query.sql contém placeholders como {{DB_EVENTO}} que são
     substituídos dinamicamente pelos valores corretos durante a execução.
+    O template é compilado uma única vez, na importação do módulo.
     
     Returns:
         jinja2.Template: Objeto template pronto para renderização
@@ -408,10 +558,9 @@ def load_query_template() -> Template:
         >>> template = load_query_template()
         >>> sql = template.render(DB_EVENTO='dexp_ram_agosto', ...)
     """
-    with open(BASE_DIR / "query.sql", "r", encoding="utf-8") as f:
-        return Template(f.read())
+    return _QUERY_TEMPLATE
 
-def run_query(sql_query: str) -> pd.DataFrame:
+def run_query(sql_query: str, params: dict = None, chunksize: int = None):
     """
     Executa a consulta SQL no banco de dados e retorna os dados como DataFrame.
     
@@ -420,34 +569,122 @@ def run_query(sql_query: str) -> pd.DataFrame:
     
     Args:
         sql_query (str): Query SQL completa a ser executada
+        params (dict, optional): Valores dos parâmetros de bind da query
+            Ex: {'data_inicio': '2024-08-01', 'data_fim': '2024-08-31'}
+        chunksize (int, optional): Se informado, os dados são devolvidos em
+            lotes de até `chunksize` linhas em vez de um único DataFrame
     
     Returns:
-        pd.DataFrame: Dados retornados pela consulta
+        pd.DataFrame | Iterator[pd.DataFrame]: Dados retornados pela consulta,
+            ou um iterador de lotes quando `chunksize` é informado
         
     Comportamento:
         - Abre uma conexão com o banco
         - Executa a query usando text() do SQLAlchemy
         - Carrega resultados diretamente em DataFrame
         - Fecha a conexão automaticamente (context manager)
+        - Com ETL_LEITOR_SQL=connectorx, delega a leitura ao connectorx
     
     Example:
         >>> df = run_query("SELECT * FROM tabela WHERE data > '2024-01-01'")
         >>> print(len(df))
         150
+        >>> df = run_query("SELECT * FROM tabela WHERE data > :d", {'d': '2024-01-01'})
+        >>> for lote in run_query("SELECT * FROM tabela", chunksize=1000):
+        ...     print(len(lote))
     """
+    if LEITOR_SQL == "connectorx":
+        return _run_query_connectorx(sql_query, params, chunksize)
+    
+    if chunksize:
+        return _run_query_em_lotes(sql_query, params, chunksize)
+    
     logger.info("Executando query no banco de dados...")
     
     # Abre conexão e executa query
     # with garante que a conexão será fechada mesmo se houver erro
     with engine.connect() as conn:
         # text() permite executar SQL raw com SQLAlchemy
-        df = pd.read_sql(text(sql_query), conn)
+        df = pd.read_sql(text(sql_query), conn, params=params)
     
-    logger.info(f"Query executada com sucesso, {len(df)} registros retornados.")
+    logger.info("Query executada com sucesso, %s registros retornados.", len(df))
     return df
 
-def reorganizar_colunas(df: pd.DataFrame, coluna_id: str, 
-                       colunas_contexto: list = None) -> pd.DataFrame:
+def _run_query_em_lotes(sql_query: str, params: dict, chunksize: int):
+    """
+    Gerador que executa a consulta e entrega o resultado em lotes.
+    
+    A conexão permanece aberta enquanto o gerador é consumido e é fechada
+    ao final da iteração (ou se o consumidor interromper o loop).
+    
+    Args:
+        sql_query (str): Query SQL completa a ser executada
+        params (dict): Valores dos parâmetros de bind da query
+        chunksize (int): Número máximo de linhas por lote
+    
+    Yields:
+        pd.DataFrame: Próximo lote de linhas do resultado
+    """
+    logger.info("Executando query no banco de dados (lotes de %s linhas)...", chunksize)
+    
+    total = 0
+    # stream_results=True faz o PyMySQL usar um cursor sem buffer (SSCursor):
+    # as linhas são lidas do servidor conforme cada lote é consumido, em vez
+    # de todo o resultado ser carregado na memória antes do primeiro lote
+    with engine.connect().execution_options(stream_results=True) as conn:
+        for lote in pd.read_sql(text(sql_query), conn, params=params, chunksize=chunksize):
+            total += len(lote)
+            yield lote
+    
+    logger.info("Query executada com sucesso, %s registros retornados.", total)
+
+def _run_query_connectorx(sql_query: str, params: dict, chunksize: int = None):
+    """
+    Executa a consulta com o connectorx, que lê o MySQL direto para Arrow.
+    
+    O connectorx evita a passagem das linhas por objetos Python (tuplas do
+    PyMySQL e Rows do SQLAlchemy). Como ele não aceita parâmetros de bind,
+    os valores de `params` são renderizados como literais SQL pelo próprio
+    SQLAlchemy, que faz o escape adequado ao MySQL.
+    
+    Args:
+        sql_query (str): Query SQL completa a ser executada
+        params (dict): Valores dos parâmetros de bind da query
+        chunksize (int, optional): Se informado, o resultado é devolvido em
+            lotes de até `chunksize` linhas
+    
+    Returns:
+        pd.DataFrame | Iterator[pd.DataFrame]: Mesmo contrato de run_query
+    
+    Raises:
+        ImportError: Se o pacote connectorx não estiver instalado
+    """
+    try:
+        import connectorx as cx
+    except ImportError:
+        logger.error("ETL_LEITOR_SQL=connectorx, mas o pacote connectorx não está instalado.")
+        raise
+    
+    # paramstyle 'named' evita que o compilador duplique os caracteres '%'
+    sql_literal = str(
+        text(sql_query).bindparams(**(params or {})).compile(
+            dialect=mysql.dialect(paramstyle='named'),
+            compile_kwargs={"literal_binds": True}
+        )
+    )
+    
+    logger.info("Executando query no banco de dados (connectorx)...")
+    tabela = cx.read_sql(DATABASE_URL_CONNECTORX, sql_literal, return_type="arrow")
+    logger.info("Query executada com sucesso, %s registros retornados.", tabela.num_rows)
+    
+    if not chunksize:
+        return tabela.to_pandas()
+    return (
+        pa.Table.from_batches([lote]).to_pandas()
+        for lote in tabela.to_batches(max_chunksize=chunksize)
+    )
+
+def reorganizar_colunas(df: pd.DataFrame, ordem: tuple) -> pd.DataFrame:
     """
     Reorganiza as colunas do DataFrame para garantir ordem consistente.
     
@@ -462,60 +699,266 @@ def reorganizar_colunas(df: pd.DataFrame, coluna_id: str,
     
     Args:
         df (pd.DataFrame): DataFrame a ser reorganizado
-        coluna_id (str): Nome da coluna que deve ser a primeira
-            Ex: 'nome_comercial', 'pdv', 'rid'
-        colunas_contexto (list, optional): Lista de colunas de contexto
-            que devem vir após a coluna_id
-            Ex: ['rid', 'sid', 'grupo', 'marca']
+        ordem (tuple): Ordem desejada das colunas, pré-montada por visão
+            Ex: ORDEM_VENDEDOR, ORDEM_PDV, ORDEM_REGIONAL
     
     Returns:
         pd.DataFrame: DataFrame com colunas reorganizadas
         
     Lógica de Ordenação:
-        1º: Coluna ID (ex: nome_comercial, pdv, rid)
-        2º: Colunas de contexto fornecidas
-        3º: Métricas na ordem padrão
-        4º: Outras colunas não especificadas
+        1º: Colunas de `ordem` que existem no DataFrame, na ordem dada
+        2º: Outras colunas não especificadas, na ordem original
     
     Example:
         >>> df = pd.DataFrame({
         ...     'venda': [10], 'nome': ['João'], 'rid': ['SUL'], 'qtd_leads': [50]
         ... })
-        >>> df_org = reorganizar_colunas(df, 'nome', ['rid'])
+        >>> df_org = reorganizar_colunas(df, ('nome', 'rid', *METRICAS))
         >>> list(df_org.columns)
         ['nome', 'rid', 'qtd_leads', 'venda']
     """
-    # Define ordem padrão das métricas (sempre a mesma em todos os arquivos)
-    metricas = [
-        'qtd_vendedores', 'qtd_leads', 'leads_visualizado', 'convite_enviado', 
-        'convite_pendente_confirmacao', 'convite_declinado_confirmacao', 
-        'convite_confirmado', 'presenca', 'testdrive', 'venda'
-    ]
-    
-    # Inicia a nova ordem com a coluna ID
-    nova_ordem = [coluna_id]
-    
-    # Adiciona colunas de contexto (se fornecidas)
-    if colunas_contexto:
-        for col in colunas_contexto:
-            # Adiciona apenas se existir no DataFrame e não for a coluna ID
-            if col in df.columns and col != coluna_id:
-                nova_ordem.append(col)
-    
-    # Adiciona métricas que existem no DataFrame
-    for metrica in metricas:
-        # Adiciona apenas se existir e ainda não foi adicionada
-        if metrica in df.columns and metrica not in nova_ordem:
-            nova_ordem.append(metrica)
+    # Verificações de pertinência por conjunto (O(1)) em vez de listas
+    presentes = set(df.columns)
+    nova_ordem = [col for col in ordem if col in presentes]
     
     # Adiciona qualquer coluna restante que não foi incluída
     # Isso garante que nenhuma coluna seja perdida
-    for col in df.columns:
-        if col not in nova_ordem:
-            nova_ordem.append(col)
+    incluidas = set(nova_ordem)
+    nova_ordem.extend(col for col in df.columns if col not in incluidas)
     
     # Retorna DataFrame com colunas reordenadas
-    return df[nova_ordem]
+    return df.reindex(columns=nova_ordem)
+
+def _agregar_por_coluna(df_pdv: pd.DataFrame, matriz: np.ndarray,
+                        coluna: str, metricas: list) -> pd.DataFrame:
+    """
+    Soma as métricas dos PDVs agrupando pelos valores de uma coluna.
+    
+    Em vez de um groupby por visão (cada um refazendo a seleção das métricas
+    e a tabela hash sobre o DataFrame), a coluna é fatorada em códigos
+    inteiros e as linhas da matriz de métricas são acumuladas diretamente
+    com np.add.at.
+    
+    Args:
+        df_pdv (pd.DataFrame): Visão PDV, contendo a coluna de agrupamento
+        matriz (np.ndarray): Métricas de df_pdv (linhas x métricas)
+        coluna (str): Coluna de agrupamento
+            Ex: 'rid', 'sid', 'grupo', 'marca'
+        metricas (list): Nomes das colunas de métricas, na ordem da matriz
+    
+    Returns:
+        pd.DataFrame: Uma linha por valor da coluna, com a coluna de
+            agrupamento seguida das métricas somadas
+    
+    Comportamento:
+        - As linhas saem ordenadas pelos valores da coluna, como no
+          groupby padrão
+        - Valores nulos na coluna formam um grupo próprio, para que a soma
+          das linhas continue igual ao total nacional
+    """
+    codigos, valores = pd.factorize(df_pdv[coluna], sort=True, use_na_sentinel=False)
+    
+    totais = np.zeros((len(valores), matriz.shape[1]), dtype=matriz.dtype)
+    np.add.at(totais, codigos, matriz)
+    
+    df_agregado = pd.DataFrame(totais, columns=metricas)
+    df_agregado.insert(0, coluna, valores)
+    return df_agregado
+
+def _preparar_lote(lote: pd.DataFrame, metricas: list) -> pd.DataFrame:
+    """
+    Normaliza um lote recém-lido do banco antes das agregações.
+    
+    Args:
+        lote (pd.DataFrame): Linhas retornadas pela query (nível vendedor)
+        metricas (list): Nomes das colunas de métricas
+    
+    Returns:
+        pd.DataFrame: Lote com métricas nulas zeradas e em int32, e chaves de
+            agrupamento sem nulos e em 'category'
+    """
+    # Chaves nulas viram 0 (como no fillna(0) do lote inteiro, usado antes):
+    # um NaN nas visões agregadas quebraria a ordenação das opções do menu
+    # do relatório (float x str). Converte as chaves para 'category': os
+    # groupby passam a operar sobre códigos inteiros em vez de calcular o
+    # hash de cada string Python, e essas colunas ocupam bem menos memória
+    for coluna in ('rid', 'sid', 'grupo', 'marca', 'pdv'):
+        chave = lote[coluna]
+        if chave.hasnans:
+            if pd.api.types.is_numeric_dtype(chave):
+                chave = chave.fillna(0)
+            else:
+                chave = chave.astype(object).fillna("0")
+        lote[coluna] = chave.astype('category')
+    
+    # fillna(0) substitui valores nulos por zero para evitar problemas nas
+    # agregações. Nas demais colunas de texto (nome comercial) o 0 não tem
+    # significado, então só as chaves acima e as métricas são preenchidas.
+    # As métricas são contagens e cabem em 32 bits: convertê-las direto para
+    # int32 (em vez de int64/float64 ou Decimal, vindo do SUM do MySQL) reduz
+    # à metade os bytes percorridos pelo groupby do PDV
+    lote[metricas] = lote[metricas].fillna(0).astype('int32')
+    
+    return lote
+
+def _tipar_chaves(df: pd.DataFrame, colunas: list):
+    """
+    Converte, no lugar, as chaves de agrupamento para um tipo fixo.
+    
+    Args:
+        df (pd.DataFrame): DataFrame agregado (ex.: visão PDV)
+        colunas (list): Chaves de agrupamento
+            Ex: ['rid', 'sid', 'grupo', 'marca', 'pdv']
+    
+    Comportamento:
+        - Chaves numéricas (ex.: 'sid') ficam em int64
+        - As demais ficam em texto ('str')
+    """
+    for coluna in colunas:
+        chave = df[coluna]
+        if isinstance(chave.dtype, pd.CategoricalDtype):
+            chave = chave.astype(chave.cat.categories.dtype)
+        if pd.api.types.infer_dtype(chave, skipna=True) in ('integer', 'floating', 'decimal'):
+            df[coluna] = chave.astype('int64')
+        else:
+            df[coluna] = chave.astype(str)
+
+def _agendar_escrita(executor: ThreadPoolExecutor, escritas: dict,
+                     df: pd.DataFrame, nome_visao: str, formato: str):
+    """
+    Agenda no pool de threads a escrita de uma visão no(s) formato(s) pedido(s).
+    
+    No formato 'ambos', o Parquet é agendado primeiro: é a escrita mais
+    rápida, e fica pronta antes para os leitores programáticos.
+    
+    No formato 'csv', um Parquet deixado por uma execução anterior é
+    removido: o relatório lê o Parquet quando ele existe, e o arquivo antigo
+    passaria por dado atual. Os CSVs nunca são removidos, pois são
+    consumidos fora do relatório; no formato 'parquet' eles apenas deixam de
+    ser atualizados.
+    
+    Args:
+        executor (ThreadPoolExecutor): Pool que executará as escritas
+        escritas (dict): Futures das escritas, indexados pelo nome do arquivo
+            (preenchido por esta função)
+        df (pd.DataFrame): Visão a ser salva
+        nome_visao (str): Nome base do arquivo, sem extensão
+            Ex: 'visao_regional'
+        formato (str): 'csv', 'parquet' ou 'ambos'
+    """
+    if formato in ("parquet", "ambos"):
+        nome_arquivo = f"{nome_visao}.parquet"
+        escritas[nome_arquivo] = executor.submit(
+            _salvar_parquet, df, output_dir / nome_arquivo
+        )
+    if formato in ("csv", "ambos"):
+        nome_arquivo = f"{nome_visao}.csv"
+        escritas[nome_arquivo] = executor.submit(
+            _salvar_csv, df, output_dir / nome_arquivo
+        )
+    
+    # Remove o Parquet que sobrou de uma execução anterior, para que o
+    # relatório não o leia no lugar do CSV recém-gravado
+    if formato == "csv":
+        (output_dir / f"{nome_visao}.parquet").unlink(missing_ok=True)
+
+def _garantir_pasta(pasta: Path):
+    """
+    Cria a pasta (e as intermediárias) na primeira vez em que é solicitada.
+    
+    As chamadas seguintes para a mesma pasta, no mesmo processo, não tocam
+    o sistema de arquivos.
+    
+    Args:
+        pasta (Path): Pasta que deve existir antes da gravação dos arquivos
+    """
+    if pasta not in _PASTAS_PREPARADAS:
+        pasta.mkdir(parents=True, exist_ok=True)
+        _PASTAS_PREPARADAS.add(pasta)
+
+def _salvar_parquet(df: pd.DataFrame, caminho: Path):
+    """
+    Salva um DataFrame em Parquet (PyArrow, compressão Snappy).
+    
+    As colunas 'category' são gravadas com dictionary encoding e os tipos
+    numéricos são preservados, dispensando conversões na leitura.
+    
+    Args:
+        df (pd.DataFrame): DataFrame a ser salvo (o índice é descartado)
+        caminho (Path): Caminho completo do arquivo Parquet de destino
+    """
+    df.to_parquet(caminho, engine='pyarrow', compression='snappy', index=False)
+
+def _salvar_csv(df: pd.DataFrame, caminho: Path, anexar: bool = False):
+    """
+    Salva um DataFrame em CSV utilizando o writer nativo (C++) do PyArrow.
+    
+    O conteúdo é o mesmo do antigo `to_csv(index=False)`: sem aspas no
+    cabeçalho nem nos valores e com a quebra de linha do sistema. Se algum
+    valor exigir aspas, a escrita volta para o pandas.
+    
+    O arquivo é aberto em modo binário. Os arquivos listados em _BOM_VIEWS
+    recebem o BOM (Byte Order Mark) UTF-8 antes do conteúdo, mantendo a
+    compatibilidade com o Excel que o antigo `to_csv(encoding='utf-8-sig')`
+    oferecia; os demais são gravados em UTF-8 sem BOM.
+    
+    Args:
+        df (pd.DataFrame): DataFrame a ser salvo (o índice é descartado)
+        caminho (Path): Caminho completo do arquivo CSV de destino
+        anexar (bool): Se True, acrescenta as linhas ao final de um arquivo
+            já existente, sem BOM nem cabeçalho (usado na escrita em lotes)
+    
+    Example:
+        >>> _salvar_csv(df_regional, output_dir / "visao_regional.csv")
+    """
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    with open(caminho, "ab" if anexar else "wb") as f:
+        if not anexar and caminho.name in _BOM_VIEWS:
+            f.write(b"\xef\xbb\xbf")
+        if _precisa_aspas(tabela):
+            # Raro: o writer do PyArrow coloca entre aspas todo campo de
+            # texto, então o CSV é gerado pelo pandas, que só usa aspas
+            # onde o conteúdo exige
+            df.to_csv(f, index=False, header=not anexar, encoding="utf-8",
+                      lineterminator=_QUEBRA_LINHA)
+            return
+        # O cabeçalho é escrito aqui (o PyArrow o colocaria entre aspas) e
+        # as linhas vão sem cabeçalho. A quebra de linha do writer é sempre
+        # "\n": em sistemas com outra (Windows), o lote passa por um buffer
+        # e é convertido; como nenhum valor contém quebras de linha (ver
+        # _precisa_aspas), a troca só atinge os finais de linha
+        if not anexar:
+            f.write(_QUEBRA_LINHA.join([",".join(tabela.column_names), ""]).encode("utf-8"))
+        opcoes = pa_csv.WriteOptions(include_header=False, quoting_style="none")
+        if _QUEBRA_LINHA == "\n":
+            pa_csv.write_csv(tabela, f, write_options=opcoes)
+        else:
+            buffer = pa.BufferOutputStream()
+            pa_csv.write_csv(tabela, buffer, write_options=opcoes)
+            f.write(buffer.getvalue().to_pybytes().replace(b"\n", _QUEBRA_LINHA.encode("ascii")))
+
+def _precisa_aspas(tabela: pa.Table) -> bool:
+    """
+    Indica se algum campo de texto da tabela exige aspas no CSV.
+    
+    Args:
+        tabela (pa.Table): Tabela que será gravada
+    
+    Returns:
+        bool: True se algum valor (ou nome de coluna) contém vírgula, aspas
+            ou quebra de linha
+    """
+    if any(re.search(_PADRAO_ASPAS, nome) for nome in tabela.column_names):
+        return True
+    for coluna in tabela.itercolumns():
+        tipo = coluna.type
+        if pa.types.is_dictionary(tipo):
+            tipo = tipo.value_type
+            coluna = coluna.cast(tipo)
+        if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+            if pc.any(pc.match_substring_regex(coluna, _PADRAO_ASPAS)).as_py():
+                return True
+    return False
 
 # ============================================================================
 # PONTO DE ENTRADA PARA TESTES ISOLADOS
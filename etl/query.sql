@@ -18,11 +18,17 @@ ESTRUTURA:
     - Filtro temporal aplicado em todas as subconsultas relevantes
 
 TEMPLATE JINJA2:
-    Este arquivo utiliza placeholders que são substituídos dinamicamente:
+    Este arquivo utiliza placeholders que são substituídos dinamicamente.
+    Apenas identificadores (nomes de banco), que não podem ser parâmetros
+    de bind, são interpolados pelo Jinja2:
     - {{DB_PDV}}: Nome do banco de dados de PDVs
     - {{DB_EVENTO}}: Nome do banco de dados do evento específico
-    - {{DATA_INICIO}}: Data inicial do período (formato: 'YYYY-MM-DD')
-    - {{DATA_FIM}}: Data final do período (formato: 'YYYY-MM-DD')
+
+PARÂMETROS DE BIND (SQLAlchemy):
+    As datas são enviadas ao MySQL como parâmetros (escritos no SQL com
+    dois-pontos antes do nome), nunca concatenadas ao texto da query:
+    - data_inicio: Data inicial do período (formato: 'YYYY-MM-DD')
+    - data_fim: Data final do período (formato: 'YYYY-MM-DD')
 
 FONTES DE DADOS:
     - {{DB_PDV}}.view_pdv_automotive: Dados dos PDVs
@@ -32,8 +38,9 @@ FONTES DE DADOS:
     - {{DB_EVENTO}}.atividades: Registros de atividades realizadas
 
 RESULTADO:
-    Dataset com uma linha por vendedor contendo:
-    - Identificação: rid, sid, grupo, marca, pdv, prospector_id, nome_comercial
+    Dataset com uma linha por vendedor, já na ordem de colunas do
+    visao_vendedor.csv:
+    - Identificação: nome_comercial, rid, sid, grupo, marca, pdv, prospector_id
     - Métricas: qtd_vendedores, qtd_leads, leads_visualizado, convite_enviado,
                convite_pendente_confirmacao, convite_declinado_confirmacao,
                convite_confirmado, presenca, testdrive, venda
@@ -118,7 +125,7 @@ cte_lead_registro AS (
         1 AS registro,                  -- Flag de registro (sempre 1 para leads registrados)
         l.registro_data                 -- Data de registro
     FROM {{ DB_EVENTO }}.leads l
-    WHERE l.registro_data BETWEEN {{ DATA_INICIO }} AND {{ DATA_FIM }}
+    WHERE l.registro_data BETWEEN :data_inicio AND :data_fim
 ),
 
 -- ============================================================================
@@ -131,7 +138,7 @@ cte_lead_visualizacao AS (
         l.visualizado,                  -- Flag booleano de visualização
         CAST(JSON_UNQUOTE(JSON_EXTRACT(l.custom, '$.visualizado_data')) AS date) AS registro_data
     FROM {{ DB_EVENTO }}.leads l
-    WHERE l.registro_data BETWEEN {{ DATA_INICIO }} AND {{ DATA_FIM }}
+    WHERE l.registro_data BETWEEN :data_inicio AND :data_fim
 ),
 
 -- ============================================================================
@@ -145,7 +152,7 @@ cte_lead_convite AS (
         IF(JSON_UNQUOTE(JSON_EXTRACT(l.custom, '$.contacted')) = 'true', 1, 0) AS convite_enviado,
         CAST(JSON_UNQUOTE(JSON_EXTRACT(l.custom, '$.contacted_at')) AS date) AS registro_data
     FROM {{ DB_EVENTO }}.leads l
-    WHERE l.registro_data BETWEEN {{ DATA_INICIO }} AND {{ DATA_FIM }}
+    WHERE l.registro_data BETWEEN :data_inicio AND :data_fim
 ),
 
 -- ============================================================================
@@ -161,7 +168,7 @@ cte_lead_confirmacao AS (
         IF(l.lead_presence = 1, 1, 0) AS convite_confirmado,
         DATE(l.confirmado_data) AS registro_data
     FROM {{ DB_EVENTO }}.leads l
-    WHERE l.registro_data BETWEEN {{ DATA_INICIO }} AND {{ DATA_FIM }}
+    WHERE l.registro_data BETWEEN :data_inicio AND :data_fim
 ),
 
 -- ============================================================================
@@ -176,7 +183,7 @@ cte_lead_atividades AS (
         (SELECT COUNT(*) 
          FROM {{ DB_EVENTO }}.atividades a 
          WHERE a.lead_id = l.lead_id 
-           AND a.registro_data BETWEEN {{ DATA_INICIO }} AND {{ DATA_FIM }}
+           AND a.registro_data BETWEEN :data_inicio AND :data_fim
            AND a.tipo_atividade_id IN (10)
         ) AS presenca,
         
@@ -184,7 +191,7 @@ cte_lead_atividades AS (
         (SELECT COUNT(*) 
          FROM {{ DB_EVENTO }}.atividades a 
          WHERE a.lead_id = l.lead_id 
-           AND a.registro_data BETWEEN {{ DATA_INICIO }} AND {{ DATA_FIM }}
+           AND a.registro_data BETWEEN :data_inicio AND :data_fim
            AND a.tipo_atividade_id IN (11)
         ) AS testdrive,
         
@@ -192,7 +199,7 @@ cte_lead_atividades AS (
         (SELECT COUNT(*) 
          FROM {{ DB_EVENTO }}.atividades a 
          WHERE a.lead_id = l.lead_id 
-           AND a.registro_data BETWEEN {{ DATA_INICIO }} AND {{ DATA_FIM }}
+           AND a.registro_data BETWEEN :data_inicio AND :data_fim
            AND a.tipo_atividade_id IN (2, 14)
         ) AS venda
         
@@ -203,15 +210,17 @@ cte_lead_atividades AS (
 -- CONSULTA PRINCIPAL
 -- ============================================================================
 -- Combina todas as CTEs e agrega dados no nível de vendedor
+-- A ordem das colunas abaixo é exatamente a do arquivo visao_vendedor.csv
+-- (ORDEM_VENDEDOR em etl.py), que é gravado sem reordenação em Python
 SELECT
     -- Identificação e contexto
+    p.nome_comercial,                   -- Nome do vendedor
     pdv.rid,                            -- Região
     pdv.sid,                            -- Setor
     pdv.grupo,                          -- Grupo empresarial
     pdv.marca,                          -- Marca
     pdv.pdv,                            -- Nome do PDV
     p.prospector_id,                    -- ID do vendedor
-    p.nome_comercial,                   -- Nome do vendedor
     
     -- Métricas agregadas
     1 AS qtd_vendedores,                -- Sempre 1 (usado para contagem em agregações futuras)
@@ -35,9 +35,13 @@ DEPENDÊNCIAS:
 # ============================================================================
 import sys
 import os
+import re
+import atexit
 import logging
+from logging.handlers import MemoryHandler
+from functools import lru_cache
 from pathlib import Path
-from datetime import datetime
+from datetime import date
 from dotenv import load_dotenv
 
 # ============================================================================
@@ -53,7 +57,8 @@ load_dotenv()
 from etl.etl import get_eventos, executar_etl
 from report.build_report import (
     carregar_dados, 
-    gerar_relatorio, 
+    gerar_relatorio_docx, 
+    converter_lote_pdf, 
     get_tipos_relatorio, 
     get_opcoes_especificas
 )
@@ -70,6 +75,9 @@ def setup_logging():
     
     Returns:
         logging.Logger: Instância configurada do logger
+    
+    Os registros ficam em um MemoryHandler e vão para o arquivo em blocos
+    (128 registros, qualquer ERROR ou no encerramento do processo).
     """
     log_dir = Path(__file__).resolve().parent / "logs"
     log_dir.mkdir(exist_ok=True)
@@ -86,27 +94,126 @@ def setup_logging():
     file_handler.setFormatter(formatter)
     
     if not logger.handlers:
-        logger.addHandler(file_handler)
+        memory_handler = MemoryHandler(
+            capacity=128, flushLevel=logging.ERROR, target=file_handler
+        )
+        logger.addHandler(memory_handler)
+        atexit.register(memory_handler.flush)
     
     return logger
 
 logger = setup_logging()
 
+# Linha separadora dos blocos do log, montada uma única vez
+_SEPARADOR_LOG = "=" * 60
+
+# Formato das visões agregadas gravadas pelo ETL (ver etl.FORMATOS_SAIDA)
+# CSV por padrão, os arquivos consumidos fora do relatório; com
+# ETL_FORMATO_SAIDA=parquet ou =ambos o relatório passa a ler o Parquet,
+# mais rápido de carregar
+FORMATO_SAIDA_ETL = os.getenv("ETL_FORMATO_SAIDA", "csv").lower()
+
 # ============================================================================
 # FUNÇÕES DE MENU (INTERFACE COM USUÁRIO)
 # ============================================================================
 
+# Sequência ANSI: limpa a tela (2J) e move o cursor para o topo (H)
+_ANSI_LIMPAR_TELA = '\x1b[2J\x1b[H'
+
+def _habilitar_ansi() -> bool:
+    """
+    Verifica se o terminal aceita sequências ANSI, habilitando-as no Windows.
+    
+    No Windows 10+ o console só interpreta sequências ANSI com o modo
+    ENABLE_VIRTUAL_TERMINAL_PROCESSING ativo, ligado aqui via ctypes.
+    
+    Returns:
+        bool: True se as sequências ANSI podem ser usadas
+    """
+    if os.name != 'nt':
+        return True
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        modo = ctypes.c_uint32()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(modo)):
+            return False
+        # 0x0004 = ENABLE_VIRTUAL_TERMINAL_PROCESSING
+        return bool(kernel32.SetConsoleMode(handle, modo.value | 0x0004))
+    except (AttributeError, OSError):
+        return False
+
+# Verificado uma única vez, na inicialização
+_ANSI_DISPONIVEL = _habilitar_ansi()
+
+# Entrada padrão ligada a um terminal? (False com entrada redirecionada)
+_INTERACTIVE = sys.stdin.isatty()
+
 def _clear_screen():
     """
     Limpa a tela do terminal de forma multiplataforma.
     
-    Detecta o sistema operacional e executa o comando apropriado:
-    - Windows: cls
-    - Linux/Mac: clear
+    Escreve a sequência ANSI de limpeza diretamente no stdout, sem criar
+    um subprocesso a cada redesenho. Se o console do Windows não aceitar
+    ANSI, usa o comando cls como alternativa.
+    """
+    if _ANSI_DISPONIVEL:
+        sys.stdout.write(_ANSI_LIMPAR_TELA)
+        sys.stdout.flush()
+    else:
+        os.system('cls')
+
+def _entrada_invalida(mensagem: str, aguardar_enter: bool = True):
+    """
+    Exibe o erro de uma entrada inválida antes de o usuário tentar de novo.
+    
+    Sem terminal interativo (entrada redirecionada ou execução automatizada)
+    não há quem responda: a função falha imediatamente, em vez de deixar o
+    loop de validação repetir a pergunta para sempre.
+    
+    Args:
+        mensagem (str): Mensagem de erro exibida ao usuário
+        aguardar_enter (bool): Se True, espera o usuário pressionar Enter
+            (os menus repetem só a pergunta, sem pausa)
+    
+    Raises:
+        ValueError: Se a entrada padrão não for um terminal interativo
     """
-    os.system('cls' if os.name == 'nt' else 'clear')
+    print(mensagem)
+    if not _INTERACTIVE:
+        raise ValueError(mensagem)
+    if aguardar_enter:
+        input("Pressione Enter para tentar novamente...")
 
-def _display_menu(titulo: str, opcoes: list, special_option_zero: str = None) -> int:
+def _prerender_menu(titulo: str, opcoes: list, special_option_zero: str = None) -> str:
+    """
+    Monta o texto completo de um menu (título e opções numeradas).
+    
+    O resultado pode ser guardado e reaproveitado em _display_menu sempre
+    que o mesmo menu for exibido de novo, sem refazer a formatação.
+    
+    Args:
+        titulo (str): Título do menu
+        opcoes (list): Lista de opções disponíveis
+        special_option_zero (str, optional): Texto para opção [0]
+    
+    Returns:
+        str: Menu pronto para ser escrito no terminal
+    """
+    linhas = [f"--- {titulo} ---"]
+    
+    # Opções numeradas (começam em 1)
+    linhas.extend(f"[{num}] {texto}" for num, texto in enumerate(opcoes, start=1))
+    
+    # Opção especial [0] se existir
+    if special_option_zero:
+        linhas.append(f"[0] {special_option_zero}")
+    
+    return '\n'.join(linhas) + '\n'
+
+def _display_menu(titulo: str, opcoes: list, special_option_zero: str = None,
+                  menu_renderizado: str = None) -> int:
     """
     Exibe um menu interativo e retorna a escolha do usuário.
     
@@ -119,6 +226,8 @@ def _display_menu(titulo: str, opcoes: list, special_option_zero: str = None) ->
         special_option_zero (str, optional): Texto para opção [0]
             Se fornecido, adiciona opção especial no índice 0
             Ex: "Voltar", "Sair"
+        menu_renderizado (str, optional): Texto do menu já montado por
+            _prerender_menu; se omitido, é montado a partir dos argumentos
     
     Returns:
         int: Número da opção escolhida pelo usuário
@@ -138,43 +247,75 @@ def _display_menu(titulo: str, opcoes: list, special_option_zero: str = None) ->
         
         Digite o número da sua escolha: 1
     """
-    # Cria dicionário de opções numeradas (começa em 1)
-    opcoes_dict = {i + 1: val for i, val in enumerate(opcoes)}
-    valid_choices = list(opcoes_dict.keys())
+    # Opções numeradas de 1 a N; conjunto: a verificação de cada entrada
+    # é O(1), não uma busca na lista
+    valid_choices = set(range(1, len(opcoes) + 1))
     
     # Adiciona opção especial [0] se fornecida
     if special_option_zero:
-        valid_choices.append(0)
+        valid_choices.add(0)
+
+    if menu_renderizado is None:
+        menu_renderizado = _prerender_menu(titulo, opcoes, special_option_zero)
+    
+    # Desenha o menu uma única vez, em uma única escrita; entradas inválidas
+    # apenas exibem a mensagem de erro abaixo dele, sem redesenhar a tela
+    _clear_screen()
+    sys.stdout.write(menu_renderizado)
+    sys.stdout.flush()
 
     # Loop até receber entrada válida
     while True:
-        _clear_screen()
-        print(f"--- {titulo} ---")
-        
-        # Exibe opções numeradas
-        for num, texto in opcoes_dict.items():
-            print(f"[{num}] {texto}")
-        
-        # Exibe opção especial [0] se existir
-        if special_option_zero:
-            print(f"[0] {special_option_zero}")
-        
         try:
             # Solicita e valida entrada do usuário
             escolha = int(input("\nDigite o número da sua escolha: "))
-            
+        except ValueError:
+            mensagem = "Entrada inválida. Por favor, digite um número."
+        else:
             if escolha in valid_choices:
                 return escolha
-            else:
-                input("\nOpção inválida. Pressione Enter para tentar novamente.")
-                
-        except ValueError:
-            input("\nEntrada inválida. Por favor, digite um número. Pressione Enter.")
+            mensagem = "Opção inválida. Tente novamente."
+        
+        _entrada_invalida(mensagem, aguardar_enter=False)
 
 # ============================================================================
 # FUNÇÕES DE VALIDAÇÃO E CONVERSÃO DE DATAS
 # ============================================================================
 
+# Formato dd/mm/aaaa, compilado uma única vez (apenas dígitos ASCII)
+_BR_RE = re.compile(r'(\d{2})/(\d{2})/(\d{4})', re.ASCII)
+
+@lru_cache(maxsize=512)
+def _parse_br_fast(data_str: str) -> date:
+    """
+    Converte uma data dd/mm/aaaa em date (memoizado).
+    
+    Como o formato é fixo, uma única regex pré-compilada valida e separa
+    dia, mês e ano, sem o strptime (que interpreta o formato genericamente
+    a cada chamada). As mesmas datas são validadas várias vezes durante a
+    navegação, por isso o resultado também fica em cache.
+    
+    Args:
+        data_str (str): Data no formato dd/mm/aaaa
+    
+    Returns:
+        date: Data convertida
+    
+    Raises:
+        ValueError: Se a data estiver em formato inválido ou não existir
+    
+    Example:
+        >>> _parse_br_fast('15/08/2024')
+        datetime.date(2024, 8, 15)
+    """
+    correspondencia = _BR_RE.fullmatch(data_str)
+    if correspondencia is None:
+        raise ValueError(f"Data '{data_str}' fora do formato dd/mm/aaaa")
+    dia, mes, ano = map(int, correspondencia.groups())
+    # date() valida dia e mês (ex: 31/02 gera ValueError)
+    return date(ano, mes, dia)
+
+@lru_cache(maxsize=512)
 def converter_data_br_para_mysql(data_br: str) -> str:
     """
     Converte uma data do formato brasileiro para formato MySQL.
@@ -195,8 +336,9 @@ def converter_data_br_para_mysql(data_br: str) -> str:
         '2024-08-15'
     """
     try:
-        data_obj = datetime.strptime(data_br, '%d/%m/%Y')
-        return data_obj.strftime('%Y-%m-%d')
+        _parse_br_fast(data_br)
+        # Data já validada: a troca de formato é só um fatiamento da string
+        return f"{data_br[6:10]}-{data_br[3:5]}-{data_br[0:2]}"
     except ValueError:
         raise ValueError(f"Data '{data_br}' está em formato inválido. Use dd/mm/aaaa")
 
@@ -219,14 +361,11 @@ def validar_data_no_escopo(data_str: str, start_date_str: str, end_date_str: str
         False
     """
     try:
-        data = datetime.strptime(data_str, '%d/%m/%Y')
-        start_date = datetime.strptime(start_date_str, '%d/%m/%Y')
-        end_date = datetime.strptime(end_date_str, '%d/%m/%Y')
-        return start_date <= data <= end_date
+        return _parse_br_fast(start_date_str) <= _parse_br_fast(data_str) <= _parse_br_fast(end_date_str)
     except ValueError:
         return False
 
-def solicitar_data(prompt: str, start_date: str, end_date: str, data_minima: str = None) -> str:
+def solicitar_data(prompt: str, start_date: date, end_date: date, data_minima: str = None) -> str:
     """
     Solicita uma data ao usuário com validação em múltiplas camadas.
     
@@ -237,8 +376,8 @@ def solicitar_data(prompt: str, start_date: str, end_date: str, data_minima: str
     
     Args:
         prompt (str): Mensagem a exibir ao usuário
-        start_date (str): Data mínima do escopo do evento (dd/mm/aaaa)
-        end_date (str): Data máxima do escopo do evento (dd/mm/aaaa)
+        start_date (date): Data mínima do escopo do evento, já convertida
+        end_date (date): Data máxima do escopo do evento, já convertida
         data_minima (str, optional): Data mínima adicional para validação
             Usado para garantir que data_fim >= data_inicio
     
@@ -248,53 +387,370 @@ def solicitar_data(prompt: str, start_date: str, end_date: str, data_minima: str
     Example:
         >>> data_inicio = solicitar_data(
         ...     "Digite a DATA DE INÍCIO:",
-        ...     "01/08/2024",
-        ...     "31/08/2024"
+        ...     date(2024, 8, 1),
+        ...     date(2024, 8, 31)
         ... )
         >>> data_fim = solicitar_data(
         ...     "Digite a DATA DE FIM:",
-        ...     "01/08/2024",
-        ...     "31/08/2024",
+        ...     date(2024, 8, 1),
+        ...     date(2024, 8, 31),
         ...     data_minima=data_inicio
         ... )
     """
+    # Limites do escopo no formato de exibição, montados fora do loop
+    periodo_valido = f"{start_date:%d/%m/%Y} até {end_date:%d/%m/%Y}"
+    
+    # Data mínima (já validada na chamada anterior) convertida uma única vez
+    data_min_obj = _parse_br_fast(data_minima) if data_minima else None
+    
     while True:
         print(f"\n{prompt}")
-        print(f"Período válido: {start_date} até {end_date}")
+        print(f"Período válido: {periodo_valido}")
         data_digitada = input("Data (dd/mm/aaaa): ").strip()
         
         # ====================================================================
         # CAMADA 1: VALIDAÇÃO DE FORMATO
         # ====================================================================
         try:
-            datetime.strptime(data_digitada, '%d/%m/%Y')
+            data_dig_obj = _parse_br_fast(data_digitada)
         except ValueError:
-            print("❌ Formato inválido! Use dd/mm/aaaa (ex: 15/01/2025)")
-            input("Pressione Enter para tentar novamente...")
+            _entrada_invalida("❌ Formato inválido! Use dd/mm/aaaa (ex: 15/01/2025)")
             continue
         
         # ====================================================================
         # CAMADA 2: VALIDAÇÃO DE ESCOPO
         # ====================================================================
-        if not validar_data_no_escopo(data_digitada, start_date, end_date):
-            print(f"❌ Data fora do período permitido! Deve estar entre {start_date} e {end_date}")
-            input("Pressione Enter para tentar novamente...")
+        # Compara a data já convertida na camada 1 com os limites recebidos
+        if not start_date <= data_dig_obj <= end_date:
+            _entrada_invalida(f"❌ Data fora do período permitido! Deve estar entre {start_date:%d/%m/%Y} e {end_date:%d/%m/%Y}")
             continue
         
         # ====================================================================
         # CAMADA 3: VALIDAÇÃO DE LÓGICA DE NEGÓCIO
         # ====================================================================
-        if data_minima:
-            data_dig_obj = datetime.strptime(data_digitada, '%d/%m/%Y')
-            data_min_obj = datetime.strptime(data_minima, '%d/%m/%Y')
-            if data_dig_obj < data_min_obj:
-                print(f"❌ A data final deve ser maior ou igual à data inicial ({data_minima})")
-                input("Pressione Enter para tentar novamente...")
-                continue
+        if data_min_obj is not None and data_dig_obj < data_min_obj:
+            _entrada_invalida(f"❌ A data final deve ser maior ou igual à data inicial ({data_minima})")
+            continue
         
         # Data válida em todas as camadas
         return data_digitada
 
+# ============================================================================
+# ESTADOS DA MÁQUINA DE ESTADOS
+# ============================================================================
+# Cada função trata um estado: recebe o contexto compartilhado e devolve o
+# nome do próximo estado (None encerra a máquina de estados)
+
+def _estado_selecionar_evento(contexto: dict) -> str:
+    """
+    Estado SELECIONAR_EVENTO: Menu de seleção de evento.
+    
+    Args:
+        contexto (dict): Dicionário de estado compartilhado (ver main)
+    
+    Returns:
+        str: Próximo estado
+    """
+    # Carrega lista de eventos disponíveis (uma vez por sessão;
+    # ao voltar para este menu, reutiliza a lista do contexto)
+    # O texto do menu também é montado uma única vez
+    if 'eventos' not in contexto:
+        contexto['eventos'] = get_eventos()
+        contexto['nomes_evento'] = [e['event_name'] for e in contexto['eventos']]
+        contexto['menu_evento'] = _prerender_menu(
+            "Selecione o Evento",
+            contexto['nomes_evento'],
+            special_option_zero="Sair"
+        )
+    eventos = contexto['eventos']
+    
+    # Exibe menu e captura escolha
+    escolha_num = _display_menu(
+        "Selecione o Evento", 
+        contexto['nomes_evento'], 
+        special_option_zero="Sair",
+        menu_renderizado=contexto['menu_evento']
+    )
+    
+    if escolha_num == 0:
+        return "SAIR"
+    
+    # Armazena evento selecionado no contexto
+    contexto['evento'] = eventos[escolha_num - 1]
+    logger.info("Evento selecionado: %s", contexto['evento']['event_name'])
+    
+    return "SELECIONAR_DATAS"
+
+def _estado_selecionar_datas(contexto: dict) -> str:
+    """
+    Estado SELECIONAR_DATAS: Entrada do período de análise.
+    
+    Args:
+        contexto (dict): Dicionário de estado compartilhado (ver main)
+    
+    Returns:
+        str: Próximo estado
+    """
+    _clear_screen()
+    print("="*60)
+    print(f"EVENTO SELECIONADO: {contexto['evento']['event_name']}")
+    print("="*60)
+    
+    # Limites do evento convertidos uma única vez para as duas datas
+    start_date = _parse_br_fast(contexto['evento']['start_date'])
+    end_date = _parse_br_fast(contexto['evento']['end_date'])
+    
+    # Solicita data de início
+    data_inicio_br = solicitar_data(
+        "📅 Digite a DATA DE INÍCIO do período de análise:",
+        start_date,
+        end_date
+    )
+    
+    # Solicita data de fim (deve ser >= data_inicio)
+    data_fim_br = solicitar_data(
+        "📅 Digite a DATA DE FIM do período de análise:",
+        start_date,
+        end_date,
+        data_minima=data_inicio_br
+    )
+    
+    # Converte para formato MySQL e armazena no contexto
+    contexto['data_inicio_mysql'] = converter_data_br_para_mysql(data_inicio_br)
+    contexto['data_fim_mysql'] = converter_data_br_para_mysql(data_fim_br)
+    contexto['data_inicio_br'] = data_inicio_br
+    contexto['data_fim_br'] = data_fim_br
+    
+    logger.info("Período selecionado: %s até %s", data_inicio_br, data_fim_br)
+    print(f"\n✅ Período confirmado: {data_inicio_br} até {data_fim_br}")
+    if _INTERACTIVE:
+        input("\nPressione Enter para continuar...")
+    
+    return "EXECUTAR_ETL"
+
+def _estado_executar_etl(contexto: dict) -> str:
+    """
+    Estado EXECUTAR_ETL: Processamento dos dados (ETL) e carga em memória.
+    
+    Args:
+        contexto (dict): Dicionário de estado compartilhado (ver main)
+    
+    Returns:
+        str: Próximo estado
+    """
+    # Mesmo evento e mesmo período da última execução: os dados
+    # já carregados continuam válidos, então ETL e carga são pulados
+    chave_etl = (
+        contexto['evento']['db_name'],
+        contexto['data_inicio_mysql'],
+        contexto['data_fim_mysql']
+    )
+    if contexto.get('chave_etl') == chave_etl and contexto.get('dados') is not None:
+        logger.info("[ETAPA 1/3] Mesmo evento e período: reutilizando os dados já carregados.")
+        return "SELECIONAR_TIPO_RELATORIO"
+    
+    logger.info("[ETAPA 1/3] Executando o processo de ETL...")
+    
+    # Executa pipeline de extração e transformação
+    executar_etl(
+        db_evento_selecionado=contexto['evento']['db_name'],
+        data_inicio=contexto['data_inicio_mysql'],
+        data_fim=contexto['data_fim_mysql'],
+        formato=FORMATO_SAIDA_ETL
+    )
+    
+    logger.info("[ETAPA 1/3] Processo de ETL concluído.")
+    logger.info("[ETAPA 2/3] Carregando dados para geração do relatório...")
+    
+    # Carrega dados processados em memória
+    contexto['dados'] = carregar_dados()
+    # Novos dados: descarta as opções de filtro calculadas antes
+    contexto['opcoes_item'] = {}
+    contexto['chave_etl'] = chave_etl
+    
+    return "SELECIONAR_TIPO_RELATORIO"
+
+def _estado_selecionar_tipo_relatorio(contexto: dict) -> str:
+    """
+    Estado SELECIONAR_TIPO_RELATORIO: Menu de tipos de relatório.
+    
+    Args:
+        contexto (dict): Dicionário de estado compartilhado (ver main)
+    
+    Returns:
+        str: Próximo estado
+    """
+    if 'opcoes_tipo' not in contexto:
+        contexto['opcoes_tipo'] = get_tipos_relatorio()
+        contexto['menu_tipo'] = _prerender_menu(
+            "Qual tipo de relatório você deseja gerar?",
+            contexto['opcoes_tipo'],
+            special_option_zero="Voltar"
+        )
+    opcoes_tipo = contexto['opcoes_tipo']
+    
+    escolha_num = _display_menu(
+        "Qual tipo de relatório você deseja gerar?", 
+        opcoes_tipo, 
+        special_option_zero="Voltar",
+        menu_renderizado=contexto['menu_tipo']
+    )
+    
+    if escolha_num == 0:
+        return "SELECIONAR_EVENTO"
+    
+    contexto['tipo_relatorio'] = opcoes_tipo[escolha_num - 1]
+    # Nome do tipo sem o prefixo "Por ", usado nos menus seguintes
+    contexto['tipo_simples'] = contexto['tipo_relatorio'].replace('Por ', '', 1)
+    logger.info("Tipo de relatório selecionado: %s", contexto['tipo_relatorio'])
+    
+    # Nacional não precisa de especificidade
+    if contexto['tipo_relatorio'] == "Nacional":
+        contexto['valor_filtro'] = None
+        return "GERAR_RELATORIO"
+    else:
+        return "SELECIONAR_ESPECIFICIDADE"
+
+def _estado_selecionar_especificidade(contexto: dict) -> str:
+    """
+    Estado SELECIONAR_ESPECIFICIDADE: Menu acumulado vs específico.
+    
+    Args:
+        contexto (dict): Dicionário de estado compartilhado (ver main)
+    
+    Returns:
+        str: Próximo estado
+    """
+    tipo_simples = contexto['tipo_simples']
+    
+    opcoes_espec = [
+        f"Todos os dados da categoria {tipo_simples} (Acumulado)", 
+        f"Um {tipo_simples} Específico"
+    ]
+    
+    escolha_num = _display_menu(
+        f"Relatório {contexto['tipo_relatorio']}", 
+        opcoes_espec, 
+        special_option_zero="Voltar"
+    )
+    
+    if escolha_num == 0:
+        return "SELECIONAR_TIPO_RELATORIO"
+    
+    if "Específico" in opcoes_espec[escolha_num - 1]:
+        return "SELECIONAR_ITEM_ESPECIFICO"
+    else:  # Acumulado
+        contexto['valor_filtro'] = None
+        logger.info("Selecionado: %s Acumulado", tipo_simples)
+        return "GERAR_RELATORIO"
+
+def _estado_selecionar_item_especifico(contexto: dict) -> str:
+    """
+    Estado SELECIONAR_ITEM_ESPECIFICO: Menu de item específico.
+    
+    Args:
+        contexto (dict): Dicionário de estado compartilhado (ver main)
+    
+    Returns:
+        str: Próximo estado
+    """
+    # Busca opções disponíveis nos dados (uma vez por tipo de
+    # relatório; ao voltar para este menu, reutiliza a lista)
+    cache_opcoes = contexto['opcoes_item']
+    if contexto['tipo_relatorio'] not in cache_opcoes:
+        cache_opcoes[contexto['tipo_relatorio']] = get_opcoes_especificas(
+            contexto['tipo_relatorio'], 
+            contexto['dados']
+        )
+    opcoes_item = cache_opcoes[contexto['tipo_relatorio']]
+    tipo_simples = contexto['tipo_simples']
+    
+    escolha_num = _display_menu(
+        f"Selecione o {tipo_simples}", 
+        opcoes_item, 
+        special_option_zero="Voltar"
+    )
+    
+    if escolha_num == 0:
+        return "SELECIONAR_ESPECIFICIDADE"
+    
+    contexto['valor_filtro'] = opcoes_item[escolha_num - 1]
+    logger.info("Item específico selecionado: %s", contexto['valor_filtro'])
+    
+    return "GERAR_RELATORIO"
+
+def _estado_gerar_relatorio(contexto: dict) -> str:
+    """
+    Estado GERAR_RELATORIO: Geração dos arquivos do relatório.
+    
+    Args:
+        contexto (dict): Dicionário de estado compartilhado (ver main)
+    
+    Returns:
+        str: Próximo estado
+    """
+    logger.info("[ETAPA 3/3] Iniciando a geração do arquivo do relatório...")
+    
+    # Gera o DOCX; a conversão para PDF é feita em lote no FINALIZAR
+    caminho_docx = gerar_relatorio_docx(
+        tipo=contexto['tipo_relatorio'],
+        dados=contexto['dados'],
+        contexto_evento=contexto['evento'],
+        valor_filtro=contexto.get('valor_filtro'),
+        data_inicio_br=contexto['data_inicio_br'],
+        data_fim_br=contexto['data_fim_br']
+    )
+    contexto.setdefault('docx_pendentes', []).append(caminho_docx)
+    
+    return "FINALIZAR"
+
+def _estado_finalizar(contexto: dict) -> str:
+    """
+    Estado FINALIZAR: Encerramento bem-sucedido.
+    
+    Args:
+        contexto (dict): Dicionário de estado compartilhado (ver main)
+    
+    Returns:
+        str: Próximo estado (None encerra a máquina de estados)
+    """
+    # Converte todos os DOCX gerados em uma única chamada ao conversor
+    converter_lote_pdf(contexto.pop('docx_pendentes', []))
+    print("\nRelatório gerado com sucesso!")
+    
+    logger.info(_SEPARADOR_LOG)
+    logger.info("PIPELINE FINALIZADO COM SUCESSO!")
+    logger.info(_SEPARADOR_LOG)
+    return None
+
+def _estado_sair(contexto: dict) -> str:
+    """
+    Estado SAIR: Encerramento por cancelamento do usuário.
+    
+    Args:
+        contexto (dict): Dicionário de estado compartilhado (ver main)
+    
+    Returns:
+        str: Próximo estado (None encerra a máquina de estados)
+    """
+    logger.info("Processo interrompido pelo usuário.")
+    logger.info("PIPELINE FINALIZADO.")
+    print("\nSaindo do programa. Até logo!")
+    return None
+
+# Despacho dos estados: nome do estado -> função que o trata
+_HANDLERS_ESTADO = {
+    "SELECIONAR_EVENTO": _estado_selecionar_evento,
+    "SELECIONAR_DATAS": _estado_selecionar_datas,
+    "EXECUTAR_ETL": _estado_executar_etl,
+    "SELECIONAR_TIPO_RELATORIO": _estado_selecionar_tipo_relatorio,
+    "SELECIONAR_ESPECIFICIDADE": _estado_selecionar_especificidade,
+    "SELECIONAR_ITEM_ESPECIFICO": _estado_selecionar_item_especifico,
+    "GERAR_RELATORIO": _estado_gerar_relatorio,
+    "FINALIZAR": _estado_finalizar,
+    "SAIR": _estado_sair,
+}
+
 # ============================================================================
 # FUNÇÃO PRINCIPAL - ORQUESTRADOR
 # ============================================================================
@@ -317,6 +773,9 @@ def main():
         - FINALIZAR: Encerramento bem-sucedido
         - SAIR: Encerramento por cancelamento do usuário
     
+    Cada estado é tratado por uma função _estado_<nome> (despacho pelo
+    dicionário _HANDLERS_ESTADO), que devolve o próximo estado.
+    
     CONTEXTO (dicionário de estado):
         - evento: Informações do evento selecionado
         - data_inicio_mysql: Data inicial em formato MySQL
@@ -325,11 +784,20 @@ def main():
         - data_fim_br: Data final em formato brasileiro
         - dados: DataFrames carregados do ETL
         - tipo_relatorio: Tipo selecionado
+        - tipo_simples: Tipo selecionado sem o prefixo "Por " (ex: "Setor")
         - valor_filtro: Filtro específico (opcional)
+        - eventos: Lista de eventos, lida uma vez por sessão
+        - nomes_evento: Nomes dos eventos (opções do menu de evento)
+        - opcoes_tipo: Tipos de relatório, lidos uma vez por sessão
+        - menu_evento / menu_tipo: Texto já montado dos menus acima
+        - opcoes_item: Opções de filtro já calculadas, por tipo de relatório
+          (reiniciado a cada carga de dados)
+        - chave_etl: (db_name, data_inicio_mysql, data_fim_mysql) dos dados
+          carregados, para não repetir o ETL com os mesmos parâmetros
     """
-    logger.info("="*60)
+    logger.info(_SEPARADOR_LOG)
     logger.info("INICIANDO O PIPELINE DE GERAÇÃO DE RELATÓRIOS")
-    logger.info("="*60)
+    logger.info(_SEPARADOR_LOG)
 
     # ========================================================================
     # INICIALIZAÇÃO
@@ -340,208 +808,11 @@ def main():
     # ========================================================================
     # LOOP PRINCIPAL DA MÁQUINA DE ESTADOS
     # ========================================================================
-    while True:
+    while estado is not None:
         try:
-            # ================================================================
-            # ESTADO: SELECIONAR_EVENTO
-            # ================================================================
-            if estado == "SELECIONAR_EVENTO":
-                # Carrega lista de eventos disponíveis
-                eventos = get_eventos()
-                opcoes_evento = [e['event_name'] for e in eventos]
-                
-                # Exibe menu e captura escolha
-                escolha_num = _display_menu(
-                    "Selecione o Evento", 
-                    opcoes_evento, 
-                    special_option_zero="Sair"
-                )
-                
-                if escolha_num == 0:
-                    estado = "SAIR"
-                    continue
-
-                # Armazena evento selecionado no contexto
-                contexto['evento'] = eventos[escolha_num - 1]
-                logger.info(f"Evento selecionado: {contexto['evento']['event_name']}")
-                
-                estado = "SELECIONAR_DATAS"
-
-            # ================================================================
-            # ESTADO: SELECIONAR_DATAS
-            # ================================================================
-            elif estado == "SELECIONAR_DATAS":
-                _clear_screen()
-                print("="*60)
-                print(f"EVENTO SELECIONADO: {contexto['evento']['event_name']}")
-                print("="*60)
-                
-                start_date = contexto['evento']['start_date']
-                end_date = contexto['evento']['end_date']
-                
-                # Solicita data de início
-                data_inicio_br = solicitar_data(
-                    "📅 Digite a DATA DE INÍCIO do período de análise:",
-                    start_date,
-                    end_date
-                )
-                
-                # Solicita data de fim (deve ser >= data_inicio)
-                data_fim_br = solicitar_data(
-                    "📅 Digite a DATA DE FIM do período de análise:",
-                    start_date,
-                    end_date,
-                    data_minima=data_inicio_br
-                )
-                
-                # Converte para formato MySQL e armazena no contexto
-                contexto['data_inicio_mysql'] = converter_data_br_para_mysql(data_inicio_br)
-                contexto['data_fim_mysql'] = converter_data_br_para_mysql(data_fim_br)
-                contexto['data_inicio_br'] = data_inicio_br
-                contexto['data_fim_br'] = data_fim_br
-                
-                logger.info(f"Período selecionado: {data_inicio_br} até {data_fim_br}")
-                print(f"\n✅ Período confirmado: {data_inicio_br} até {data_fim_br}")
-                input("\nPressione Enter para continuar...")
-                
-                estado = "EXECUTAR_ETL"
-
-            # ================================================================
-            # ESTADO: EXECUTAR_ETL
-            # ================================================================
-            elif estado == "EXECUTAR_ETL":
-                logger.info("[ETAPA 1/3] Executando o processo de ETL...")
-                
-                # Executa pipeline de extração e transformação
-                executar_etl(
-                    db_evento_selecionado=contexto['evento']['db_name'],
-                    data_inicio=contexto['data_inicio_mysql'],
-                    data_fim=contexto['data_fim_mysql']
-                )
-                
-                logger.info("[ETAPA 1/3] Processo de ETL concluído.")
-                logger.info("[ETAPA 2/3] Carregando dados para geração do relatório...")
-                
-                # Carrega dados processados em memória
-                contexto['dados'] = carregar_dados()
-                
-                estado = "SELECIONAR_TIPO_RELATORIO"
-
-            # ================================================================
-            # ESTADO: SELECIONAR_TIPO_RELATORIO
-            # ================================================================
-            elif estado == "SELECIONAR_TIPO_RELATORIO":
-                opcoes_tipo = get_tipos_relatorio()
-                
-                escolha_num = _display_menu(
-                    "Qual tipo de relatório você deseja gerar?", 
-                    opcoes_tipo, 
-                    special_option_zero="Voltar"
-                )
-                
-                if escolha_num == 0:
-                    estado = "SELECIONAR_EVENTO"
-                    continue
-
-                contexto['tipo_relatorio'] = opcoes_tipo[escolha_num - 1]
-                logger.info(f"Tipo de relatório selecionado: {contexto['tipo_relatorio']}")
-                
-                # Nacional não precisa de especificidade
-                if contexto['tipo_relatorio'] == "Nacional":
-                    contexto['valor_filtro'] = None
-                    estado = "GERAR_RELATORIO"
-                else:
-                    estado = "SELECIONAR_ESPECIFICIDADE"
-
-            # ================================================================
-            # ESTADO: SELECIONAR_ESPECIFICIDADE
-            # ================================================================
-            elif estado == "SELECIONAR_ESPECIFICIDADE":
-                tipo_simples = contexto['tipo_relatorio'].replace('Por ', '')
-                
-                opcoes_espec = [
-                    f"Todos os dados da categoria {tipo_simples} (Acumulado)", 
-                    f"Um {tipo_simples} Específico"
-                ]
-                
-                escolha_num = _display_menu(
-                    f"Relatório {contexto['tipo_relatorio']}", 
-                    opcoes_espec, 
-                    special_option_zero="Voltar"
-                )
-
-                if escolha_num == 0:
-                    estado = "SELECIONAR_TIPO_RELATORIO"
-                    continue
-                
-                if "Específico" in opcoes_espec[escolha_num - 1]:
-                    estado = "SELECIONAR_ITEM_ESPECIFICO"
-                else:  # Acumulado
-                    contexto['valor_filtro'] = None
-                    logger.info(f"Selecionado: {tipo_simples} Acumulado")
-                    estado = "GERAR_RELATORIO"
-
-            # ================================================================
-            # ESTADO: SELECIONAR_ITEM_ESPECIFICO
-            # ================================================================
-            elif estado == "SELECIONAR_ITEM_ESPECIFICO":
-                # Busca opções disponíveis nos dados
-                opcoes_item = get_opcoes_especificas(
-                    contexto['tipo_relatorio'], 
-                    contexto['dados']
-                )
-                tipo_simples = contexto['tipo_relatorio'].replace('Por ', '')
-                
-                escolha_num = _display_menu(
-                    f"Selecione o {tipo_simples}", 
-                    opcoes_item, 
-                    special_option_zero="Voltar"
-                )
-
-                if escolha_num == 0:
-                    estado = "SELECIONAR_ESPECIFICIDADE"
-                    continue
-                
-                contexto['valor_filtro'] = opcoes_item[escolha_num - 1]
-                logger.info(f"Item específico selecionado: {contexto['valor_filtro']}")
-                
-                estado = "GERAR_RELATORIO"
-
-            # ================================================================
-            # ESTADO: GERAR_RELATORIO
-            # ================================================================
-            elif estado == "GERAR_RELATORIO":
-                logger.info("[ETAPA 3/3] Iniciando a geração do arquivo do relatório...")
-                
-                # Gera relatório DOCX e PDF
-                gerar_relatorio(
-                    tipo=contexto['tipo_relatorio'],
-                    dados=contexto['dados'],
-                    contexto_evento=contexto['evento'],
-                    valor_filtro=contexto.get('valor_filtro'),
-                    data_inicio_br=contexto['data_inicio_br'],
-                    data_fim_br=contexto['data_fim_br']
-                )
-                
-                estado = "FINALIZAR"
-
-            # ================================================================
-            # ESTADO: FINALIZAR
-            # ================================================================
-            elif estado == "FINALIZAR":
-                logger.info("="*60)
-                logger.info("PIPELINE FINALIZADO COM SUCESSO!")
-                logger.info("="*60)
-                break
-
-            # ================================================================
-            # ESTADO: SAIR
-            # ================================================================
-            elif estado == "SAIR":
-                logger.info("Processo interrompido pelo usuário.")
-                logger.info("PIPELINE FINALIZADO.")
-                print("\nSaindo do programa. Até logo!")
-                break
+            # Despacho direto: cada estado é tratado por sua função em
+            # _HANDLERS_ESTADO, que devolve o próximo estado (None encerra)
+            estado = _HANDLERS_ESTADO[estado](contexto)
 
         # ====================================================================
         # TRATAMENTO DE EXCEÇÕES
@@ -552,8 +823,8 @@ def main():
             
         except Exception as e:
             # Erro inesperado durante execução
-            logger.critical("="*60)
-            logger.critical(f"Ocorreu um erro crítico que interrompeu o pipeline: {e}", exc_info=True)
+            logger.critical(_SEPARADOR_LOG)
+            logger.critical("Ocorreu um erro crítico que interrompeu o pipeline: %s", e, exc_info=True)
             logger.critical("PIPELINE FINALIZADO COM ERRO.")
             print(f"\nOcorreu um erro fatal: {e}")
             break
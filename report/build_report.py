@@ -8,7 +8,7 @@ Data: Outubro 2025
 
 DESCRIÇÃO:
     Módulo de serviço responsável por gerar relatórios em DOCX e PDF.
-    Carrega dados dos CSVs gerados pelo ETL, calcula métricas e percentuais,
+    Carrega as visões (Parquet ou CSV) geradas pelo ETL, calcula métricas e percentuais,
     preenche o template DOCX e converte para PDF.
 
 FUNCIONALIDADES:
@@ -29,20 +29,35 @@ TIPOS DE RELATÓRIO SUPORTADOS:
 
 DEPENDÊNCIAS:
     - pandas: Manipulação de dados
-    - python-docx: Geração de documentos Word
-    - docx2pdf: Conversão para PDF
+    - pyarrow: Leitura das visões (CSV com tipos declarados e Parquet)
+    - python-docx: Geração de documentos Word (importado sob demanda)
+    - docx2pdf: Conversão para PDF (importado sob demanda)
 ============================================================================
 """
 
 # ============================================================================
 # IMPORTAÇÕES
 # ============================================================================
+import atexit
+import copy
+import io
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pa_parquet
 from pathlib import Path
-import docx
-import docx2pdf
+from types import SimpleNamespace
 from datetime import datetime
-import locale
 import logging
 
 # ============================================================================
@@ -54,12 +69,37 @@ TEMPLATE_PATH = BASE_DIR / "templates" / "template.docx"  # template DOCX
 OUTPUT_DIR = BASE_DIR.parent / "output"                 # pasta de saída
 OUTPUT_DIR.mkdir(exist_ok=True)
 
-# Configura localização para formatação de números (português brasileiro)
-try:
-    locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
-except locale.Error:
-    # Fallback para Windows
-    locale.setlocale(locale.LC_ALL, 'Portuguese_Brazil.1252')
+# Conteúdo bruto do template DOCX, lido do disco uma única vez
+# (ver _carregar_template)
+_TEMPLATE_BYTES = None
+
+# DataFrames já carregados por carregar_dados, indexados pela "impressão
+# digital" dos CSVs (nome, mtime, tamanho). Guarda só a carga mais recente
+_DATA_CACHE: dict[tuple, dict] = {}
+
+# Linhas modelo (<w:tr> já formatadas) da tabela geral, por índice da
+# tabela: montadas no primeiro relatório (ver _criar_linha_modelo)
+_LINHAS_MODELO: dict = {}
+
+# Cópias sem compressão dos DOCX ainda não convertidos para PDF: caminho do
+# DOCX entregue -> cópia temporária lida pelo conversor (ver
+# gerar_relatorio_docx e converter_lote_pdf)
+_COPIAS_CONVERSAO: dict[Path, Path] = {}
+
+def _apagar_copias_conversao():
+    """Apaga as cópias de DOCX que não chegaram a ser convertidas (chamada no atexit)."""
+    while _COPIAS_CONVERSAO:
+        _, copia = _COPIAS_CONVERSAO.popitem()
+        shutil.rmtree(copia.parent, ignore_errors=True)
+
+atexit.register(_apagar_copias_conversao)
+
+# Visões de dimensão: carregar_dados indexa cada uma pela sua coluna de
+# identificação (a primeira), para buscas diretas com .loc
+_VISOES_DIMENSAO = ("visao_regional", "visao_setor", "visao_grupo", "visao_marca", "visao_pdv")
+
+# Tipos de relatório oferecidos no menu (fixos)
+TIPOS_RELATORIO = ("Nacional", "Regional", "Por Setor", "Por Grupo", "Por Marca", "Por PDV")
 
 # ============================================================================
 # CONFIGURAÇÃO DO SISTEMA DE LOGGING
@@ -108,7 +148,7 @@ def get_tipos_relatorio() -> list:
         >>> print(tipos)
         ['Nacional', 'Regional', 'Por Setor', 'Por Grupo', 'Por Marca', 'Por PDV']
     """
-    return ["Nacional", "Regional", "Por Setor", "Por Grupo", "Por Marca", "Por PDV"]
+    return list(TIPOS_RELATORIO)
 
 def get_opcoes_especificas(tipo: str, dados: dict) -> list:
     """
@@ -117,6 +157,9 @@ def get_opcoes_especificas(tipo: str, dados: dict) -> list:
     Por exemplo, se o tipo for "Regional", retorna todas as regiões disponíveis
     nos dados (SUL, SUDESTE, etc.).
     
+    O main guarda as opções de cada tipo enquanto os dados carregados não
+    mudam, então a coluna só é percorrida uma vez por carga.
+    
     Args:
         tipo (str): Tipo do relatório ('Regional', 'Por PDV', etc.)
         dados (dict): Dicionário com DataFrames carregados
@@ -132,28 +175,48 @@ def get_opcoes_especificas(tipo: str, dados: dict) -> list:
         >>> print(opcoes)
         ['CENTRO-OESTE', 'NORDESTE', 'NORTE', 'SUDESTE', 'SUL']
     """
-    # Converte tipo para nome do DataFrame
+    # Nome do DataFrame do tipo (ver _TIPO_CONFIG)
     # Ex: "Por Setor" -> "visao_setor"
-    nome_df = f"visao_{tipo.lower().replace('por ', '')}"
+    config = _TIPO_CONFIG.get(tipo)
+    if config is None:
+        raise ValueError(f"Tipo de relatório '{tipo}' inválido. Use um de: {', '.join(_TIPO_CONFIG)}")
+    nome_df = config['visao']
     
     df_opcoes = dados.get(nome_df)
     if df_opcoes is None:
         raise ValueError(f"DataFrame '{nome_df}.csv' não encontrado para buscar opções.")
     
     # Primeira coluna sempre é a coluna de identificação
-    coluna_opcoes = list(df_opcoes.columns)[0]
-    
-    # Retorna lista única e ordenada
-    return sorted(df_opcoes[coluna_opcoes].unique())
+    coluna_opcoes = df_opcoes.columns[0]
+    
+    # Lista única e ordenada, sem ausentes; a chave de ordenação põe os
+    # números antes dos textos, para que uma coluna com tipos misturados
+    # (ex.: 'category' com 0 e nomes) não quebre a comparação
+    return sorted(
+        df_opcoes[coluna_opcoes].dropna().unique(),
+        key=lambda opcao: (isinstance(opcao, str), opcao)
+    )
 
 def carregar_dados() -> dict[str, pd.DataFrame]:
     """
-    Lê todos os arquivos CSV da pasta de output e os carrega em DataFrames.
+    Lê todas as visões da pasta de output e as carrega em DataFrames.
+    
+    Cada visão é lida do seu arquivo Parquet (tipado, colunar, gravado pelo
+    ETL) quando ele existe; caso contrário, do CSV de mesmo nome.
     
-    Além de carregar os CSVs, esta função também:
+    Além de carregar os arquivos, esta função também:
     - Converte colunas numéricas explicitamente para int
     - Trata valores ausentes (NaN) como 0
     - Indexa os DataFrames por nome de arquivo
+    - Indexa as visões de dimensão (_VISOES_DIMENSAO) pela coluna de
+      identificação, que continua também como coluna
+    - Pré-calcula as relações usadas nos filtros dos relatórios, nas chaves
+      internas '_rid_to_sids' (região -> setores) e '_pdv_to_vendedores'
+      (PDV -> posições das suas linhas em visao_vendedor)
+    
+    Enquanto os arquivos não mudarem (mesmos nomes, datas de modificação e
+    tamanhos), chamadas seguintes reaproveitam os DataFrames já carregados,
+    sem ler o disco. carregar_dados.cache_clear() descarta essa cópia.
     
     Returns:
         dict[str, pd.DataFrame]: Dicionário com DataFrames indexados por nome
@@ -170,7 +233,7 @@ def carregar_dados() -> dict[str, pd.DataFrame]:
         >>> print(len(dados['visao_vendedor']))
         150
     """
-    logger.info("Iniciando carregamento dos dados CSV.")
+    logger.info("Iniciando carregamento dos dados das visões.")
     
     dataframes = {}
     
@@ -180,6 +243,24 @@ def carregar_dados() -> dict[str, pd.DataFrame]:
             f"Diretório de dados '{DATA_DIR}' não encontrado. Execute o ETL primeiro."
         )
     
+    # Um arquivo por visão: o Parquet substitui o CSV de mesmo nome (o ETL
+    # só grava Parquet nos formatos 'parquet' e 'ambos', e o remove no
+    # formato 'csv', então o Parquet nunca fica desatualizado em relação ao CSV)
+    escolhidos = {}
+    for arquivo in [*DATA_DIR.glob("*.csv"), *DATA_DIR.glob("*.parquet")]:
+        escolhidos[arquivo.stem] = arquivo
+    arquivos = sorted(escolhidos.values())
+    
+    # Reaproveita a última carga se nenhum arquivo mudou desde então (um novo
+    # ETL regrava os arquivos e muda a impressão digital)
+    impressao_digital = tuple(
+        (arquivo.name, estado.st_mtime_ns, estado.st_size)
+        for arquivo, estado in ((arquivo, arquivo.stat()) for arquivo in arquivos)
+    )
+    if impressao_digital in _DATA_CACHE:
+        logger.info("Arquivos inalterados desde a última carga; reutilizando os dados em memória.")
+        return _copiar_dados(_DATA_CACHE[impressao_digital])
+    
     # Define colunas que devem ser convertidas para numérico
     colunas_numericas = [
         'qtd_vendedores', 'qtd_leads', 'leads_visualizado', 'convite_enviado', 
@@ -187,22 +268,36 @@ def carregar_dados() -> dict[str, pd.DataFrame]:
         'convite_confirmado', 'presenca', 'testdrive', 'venda'
     ]
     
-    # Carrega cada arquivo CSV
-    for csv_file in DATA_DIR.glob("*.csv"):
-        nome_visao = csv_file.stem  # Nome sem extensão
-        df = pd.read_csv(csv_file)
-        
-        # Converte colunas numéricas explicitamente
-        for col in colunas_numericas:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
-        
-        dataframes[nome_visao] = df
-        logger.info(f"DataFrame '{nome_visao}' carregado com {len(df)} linhas.")
+    # Tipos das métricas declarados de antemão: o leitor do Arrow já as lê
+    # como int64 (células vazias viram nulos), sem inferência de tipos nem
+    # uma segunda conversão. Colunas ausentes em um arquivo são ignoradas
+    opcoes_conversao = pa_csv.ConvertOptions(
+        column_types={col: pa.int64() for col in colunas_numericas},
+        null_values=['', 'NA'],
+        strings_can_be_null=True
+    )
+    
+    # Carrega as visões em paralelo: cada arquivo é independente e os
+    # leitores do Arrow liberam o GIL durante a leitura, então threads bastam
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(arquivos)))) as executor:
+        resultados = executor.map(
+            lambda arquivo: _carregar_visao(arquivo, colunas_numericas, opcoes_conversao),
+            arquivos
+        )
+        for nome_visao, df in resultados:
+            dataframes[nome_visao] = df
+            logger.info("DataFrame '%s' carregado com %s linhas.", nome_visao, len(df))
+    
+    _indexar_relacoes(dataframes)
+    
+    _DATA_CACHE.clear()
+    _DATA_CACHE[impressao_digital] = _copiar_dados(dataframes)
     
     logger.info("Carregamento de dados concluído.")
     return dataframes
 
+carregar_dados.cache_clear = _DATA_CACHE.clear
+
 def gerar_relatorio(tipo: str, dados: dict, contexto_evento: dict, 
                     valor_filtro: str = None, data_inicio_br: str = None, 
                     data_fim_br: str = None) -> Path:
@@ -216,6 +311,9 @@ def gerar_relatorio(tipo: str, dados: dict, contexto_evento: dict,
     4. Salva arquivo DOCX
     5. Converte para PDF
     
+    Para gerar vários relatórios de uma vez, use gerar_relatorio_docx para
+    cada um e converta todos juntos com converter_lote_pdf.
+    
     Args:
         tipo (str): Tipo do relatório ('Nacional', 'Regional', etc.)
         dados (dict): Dicionário com DataFrames carregados
@@ -240,6 +338,27 @@ def gerar_relatorio(tipo: str, dados: dict, contexto_evento: dict,
         >>> print(caminho)
         PosixPath('output/Relatorio_Regional_SUDESTE_202410141530.pdf')
     """
+    caminho_docx = gerar_relatorio_docx(
+        tipo, dados, contexto_evento, valor_filtro, data_inicio_br, data_fim_br
+    )
+    caminho_pdf, = converter_lote_pdf([caminho_docx])
+    return caminho_pdf
+
+def gerar_relatorio_docx(tipo: str, dados: dict, contexto_evento: dict, 
+                         valor_filtro: str = None, data_inicio_br: str = None, 
+                         data_fim_br: str = None) -> Path:
+    """
+    Gera o relatório em DOCX, sem convertê-lo para PDF.
+    
+    Executa as etapas 1 a 4 de gerar_relatorio; a conversão fica a cargo de
+    converter_lote_pdf, que pode receber vários documentos de uma só vez.
+    
+    Args:
+        (mesmos de gerar_relatorio)
+    
+    Returns:
+        Path: Caminho do arquivo DOCX gerado
+    """
     logger.info("="*50)
     logger.info("MÓDULO DE GERAÇÃO DE RELATÓRIO INICIADO.")
     
@@ -253,8 +372,8 @@ def gerar_relatorio(tipo: str, dados: dict, contexto_evento: dict,
     # ========================================================================
     # FASE 2: PREENCHIMENTO DO TEMPLATE
     # ========================================================================
-    # Carrega o template DOCX
-    doc = docx.Document(TEMPLATE_PATH)
+    # Carrega o template DOCX (a partir dos bytes já em memória)
+    doc = _carregar_template()
     
     # Substitui todos os placeholders no documento
     replace_text_in_doc(doc, contexto)
@@ -264,31 +383,272 @@ def gerar_relatorio(tipo: str, dados: dict, contexto_evento: dict,
         popular_tabela_geral(doc, df_tabela_geral, 0)
 
     # ========================================================================
-    # FASE 3: SALVAMENTO E CONVERSÃO
+    # FASE 3: SALVAMENTO
     # ========================================================================
     # Define nome do arquivo baseado no tipo e timestamp
     titulo_visao = contexto["{{tipo_visao}}"]
     nome_arquivo_base = f"Relatorio_{titulo_visao}_{datetime.now().strftime('%Y%m%d%H%M')}"
     caminho_docx = OUTPUT_DIR / f"{nome_arquivo_base}.docx"
-    caminho_pdf = OUTPUT_DIR / f"{nome_arquivo_base}.pdf"
 
-    # Salva documento DOCX
-    logger.info(f"Salvando relatório em DOCX: {caminho_docx}")
+    # Salva o DOCX entregue ao usuário, comprimido como de costume
+    logger.info("Salvando relatório em DOCX: %s", caminho_docx)
     doc.save(caminho_docx)
     
-    # Converte para PDF
-    logger.info(f"Convertendo para PDF: {caminho_pdf}")
-    docx2pdf.convert(str(caminho_docx), str(caminho_pdf))
+    # Cópia intermediária sem compressão, lida pelo conversor de PDF (que
+    # assim não precisa descompactá-la) e apagada após a conversão
+    copia = Path(tempfile.mkdtemp(prefix="relatorio_")) / caminho_docx.name
+    _salvar_docx_sem_compressao(doc, copia)
+    anterior = _COPIAS_CONVERSAO.pop(caminho_docx, None)
+    if anterior is not None:
+        # Mesmo nome no mesmo minuto: o DOCX anterior foi sobrescrito
+        shutil.rmtree(anterior.parent, ignore_errors=True)
+    _COPIAS_CONVERSAO[caminho_docx] = copia
+    
+    return caminho_docx
+
+def converter_lote_pdf(caminhos_docx: list) -> list:
+    """
+    Converte um ou mais relatórios DOCX para PDF em uma única execução.
+    
+    Abrir o conversor (Word ou LibreOffice) é a parte mais cara da
+    conversão, então os documentos recebidos são enviados de uma só vez
+    (o main gera um relatório por sessão, mas a função aceita vários):
+    - Windows: docx2pdf (Word), como sempre foi; vários arquivos são
+      convertidos a partir de uma pasta temporária, em uma única sessão
+    - Outros sistemas, com o LibreOffice (soffice) no PATH: uma chamada com
+      todos os arquivos
+    - Caso contrário, docx2pdf (Word no macOS)
+    
+    Cada PDF é gravado ao lado do DOCX correspondente, com o mesmo nome.
+    Para os DOCX gerados por gerar_relatorio_docx, o conversor lê a cópia
+    temporária sem compressão, que é apagada em seguida.
+    
+    Args:
+        caminhos_docx (list[Path]): Arquivos DOCX a converter
+    
+    Returns:
+        list[Path]: Caminhos dos PDFs gerados, na mesma ordem da entrada
+    
+    Raises:
+        subprocess.CalledProcessError: Se o LibreOffice falhar na conversão
+    """
+    caminhos_docx = [Path(c) for c in caminhos_docx]
+    caminhos_pdf = [c.with_suffix(".pdf") for c in caminhos_docx]
+    if not caminhos_docx:
+        return caminhos_pdf
+    
+    for caminho_pdf in caminhos_pdf:
+        logger.info("Convertendo para PDF: %s", caminho_pdf)
+    
+    # Arquivo lido pelo conversor: a cópia sem compressão, quando existe
+    # (tem o mesmo nome do DOCX, então o PDF sai com o nome certo)
+    origens = [_COPIAS_CONVERSAO.pop(caminho, caminho) for caminho in caminhos_docx]
+    try:
+        _converter(caminhos_docx, origens, caminhos_pdf)
+    finally:
+        for caminho, origem in zip(caminhos_docx, origens):
+            if origem != caminho:
+                shutil.rmtree(origem.parent, ignore_errors=True)
     
     logger.info("Relatório gerado com sucesso!")
-    print("\nRelatório gerado com sucesso!")
     
-    return caminho_pdf
+    return caminhos_pdf
 
 # ============================================================================
 # FUNÇÕES AUXILIARES INTERNAS (PRIVADAS)
 # ============================================================================
 
+def _carregar_visao(arquivo: Path, colunas_numericas: list, 
+                    opcoes_conversao) -> tuple[str, pd.DataFrame]:
+    """
+    Lê o arquivo de uma visão (.csv ou .parquet) com as métricas em int64.
+    
+    Usado por carregar_dados. O Parquet já traz os tipos gravados pelo ETL;
+    as métricas só são convertidas para int64 (o ETL as grava em int32) para
+    que o resultado seja igual ao da leitura do CSV.
+    
+    Args:
+        arquivo (Path): Arquivo CSV ou Parquet de uma visão
+        colunas_numericas (list): Métricas cujos nulos devem virar 0
+        opcoes_conversao (pyarrow.csv.ConvertOptions): Tipos das colunas do CSV
+    
+    Returns:
+        tuple[str, pd.DataFrame]: Nome da visão (nome do arquivo sem
+            extensão) e o DataFrame carregado
+    """
+    if arquivo.suffix == ".parquet":
+        tabela = pa_parquet.read_table(arquivo)
+    else:
+        tabela = pa_csv.read_csv(arquivo, convert_options=opcoes_conversao)
+    
+    # Zera valores ausentes das métricas e padroniza o tipo, direto nas
+    # colunas do Arrow
+    for col in colunas_numericas:
+        indice = tabela.schema.get_field_index(col)
+        if indice == -1:
+            continue
+        coluna = tabela.column(indice)
+        if coluna.null_count:
+            coluna = pc.fill_null(coluna, 0)
+        if coluna.type != pa.int64():
+            coluna = coluna.cast(pa.int64())
+        if coluna is not tabela.column(indice):
+            tabela = tabela.set_column(indice, col, coluna)
+    
+    df = tabela.to_pandas()
+    
+    # Índice (sem nome, para não conflitar com a coluna) com a chave da
+    # visão: a busca por um valor passa a usar a tabela hash do índice
+    if arquivo.stem in _VISOES_DIMENSAO:
+        df = df.set_index(df.columns[0], drop=False)
+        df.index.name = None
+    
+    return arquivo.stem, df
+
+def _indexar_relacoes(dados: dict):
+    """
+    Pré-calcula, uma única vez por carga, as relações usadas nos filtros.
+    
+    Adiciona ao próprio dicionário (usado por carregar_dados):
+    - '_rid_to_sids': região -> array com os setores dos seus PDVs
+    - '_pdv_to_vendedores': PDV -> posições (iloc) das suas linhas em
+      visao_vendedor, na ordem do arquivo
+    
+    Args:
+        dados (dict): Dicionário de DataFrames recém-carregados
+    """
+    # observed=True: com chaves em 'category', só as categorias presentes
+    # nos dados geram entradas
+    df_pdv = dados.get("visao_pdv")
+    if df_pdv is not None:
+        dados['_rid_to_sids'] = df_pdv.groupby(
+            'rid', sort=False, observed=True
+        )['sid'].unique().to_dict()
+    
+    df_vendedor = dados.get("visao_vendedor")
+    if df_vendedor is not None:
+        dados['_pdv_to_vendedores'] = df_vendedor.groupby(
+            'pdv', sort=False, observed=True
+        ).indices
+
+def _copiar_dados(dados: dict) -> dict:
+    """
+    Copia o dicionário de dados carregados para entregá-lo ao chamador.
+    
+    Os DataFrames recebem cópias rasas (com o copy-on-write do pandas, uma
+    alteração do chamador copia os dados antes de escrever, sem afetar o
+    cache de carregar_dados). As relações pré-calculadas (dicionários de
+    arrays) são copiadas, dicionário e arrays, pelo mesmo motivo.
+    
+    Args:
+        dados (dict): Dicionário de dados a copiar
+    
+    Returns:
+        dict: Novo dicionário com as mesmas chaves
+    """
+    return {
+        nome: (
+            valor.copy(deep=False) if isinstance(valor, pd.DataFrame)
+            else {chave: np.copy(itens) for chave, itens in valor.items()}
+        )
+        for nome, valor in dados.items()
+    }
+
+def _carregar_template():
+    """
+    Retorna um novo documento criado a partir do template DOCX.
+    
+    O arquivo é lido do disco apenas na primeira chamada; as seguintes
+    abrem o documento a partir dos bytes em memória. Cada chamada devolve
+    um documento independente, que pode ser preenchido sem afetar os demais.
+    
+    Returns:
+        docx.Document: Documento pronto para ser preenchido
+    """
+    # Importação adiada: python-docx só é carregado quando um relatório é gerado
+    import docx
+    
+    global _TEMPLATE_BYTES
+    if _TEMPLATE_BYTES is None:
+        _TEMPLATE_BYTES = TEMPLATE_PATH.read_bytes()
+    return docx.Document(io.BytesIO(_TEMPLATE_BYTES))
+
+def _converter(caminhos_docx: list, origens: list, caminhos_pdf: list):
+    """
+    Executa a conversão de converter_lote_pdf.
+    
+    Args:
+        caminhos_docx (list[Path]): DOCX entregues (definem a pasta do PDF)
+        origens (list[Path]): Arquivos efetivamente lidos pelo conversor
+        caminhos_pdf (list[Path]): PDFs a gerar, na mesma ordem
+    """
+    # No Windows o Word (docx2pdf) continua sendo o conversor
+    soffice = None if sys.platform == "win32" else (
+        shutil.which("soffice") or shutil.which("libreoffice")
+    )
+    if soffice:
+        # --outdir por pasta de destino (normalmente todos em OUTPUT_DIR)
+        por_pasta = {}
+        for caminho, origem in zip(caminhos_docx, origens):
+            por_pasta.setdefault(caminho.parent, []).append(str(origem))
+        for pasta, arquivos in por_pasta.items():
+            subprocess.run(
+                [soffice, "--headless", "--convert-to", "pdf", "--outdir", str(pasta), *arquivos],
+                check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+    else:
+        # Importação adiada: docx2pdf (que no Windows prepara a automação do
+        # Word) só é carregado quando um relatório é convertido
+        import docx2pdf
+        
+        if len(origens) == 1:
+            docx2pdf.convert(str(origens[0]), str(caminhos_pdf[0]))
+        else:
+            # docx2pdf converte uma pasta inteira em uma sessão do Word; a
+            # pasta temporária contém apenas os arquivos deste lote
+            with tempfile.TemporaryDirectory() as pasta_tmp:
+                pasta_tmp = Path(pasta_tmp)
+                for origem in origens:
+                    shutil.copy2(origem, pasta_tmp / origem.name)
+                docx2pdf.convert(str(pasta_tmp), str(pasta_tmp))
+                for origem, caminho_pdf in zip(origens, caminhos_pdf):
+                    shutil.move(str(pasta_tmp / f"{origem.stem}.pdf"), str(caminho_pdf))
+
+def _salvar_docx_sem_compressao(doc, caminho: Path):
+    """
+    Salva o documento com as partes do ZIP armazenadas (ZIP_STORED).
+    
+    Usado só para a cópia temporária lida pelo conversor de PDF: o arquivo
+    fica cerca de duas vezes maior, então o DOCX entregue ao usuário
+    continua sendo gravado comprimido, pelo doc.save.
+    
+    O python-docx grava o pacote sempre com ZIP_DEFLATED; aqui as partes do
+    pacote são serializadas pelas mesmas rotinas do seu PackageWriter, mas
+    gravadas em um ZipFile próprio, sem compressão (nada global é alterado,
+    então saves em threads diferentes não interferem entre si). Essas
+    rotinas (e o before_marshal das partes) são internas do python-docx; a
+    versão máxima está fixada no requirements.txt.
+    
+    Args:
+        doc (docx.Document): Documento a ser salvo
+        caminho (Path): Caminho do arquivo DOCX de destino
+    """
+    from docx.opc.pkgwriter import PackageWriter
+    
+    pacote = doc.part.package
+    partes = list(pacote.parts)
+    for parte in partes:
+        parte.before_marshal()
+    
+    with zipfile.ZipFile(caminho, "w", compression=zipfile.ZIP_STORED) as arquivo_zip:
+        # Só o write(pack_uri, blob) do escritor é usado pelo PackageWriter
+        escritor = SimpleNamespace(
+            write=lambda pack_uri, blob: arquivo_zip.writestr(pack_uri.membername, blob)
+        )
+        PackageWriter._write_content_types_stream(escritor, partes)
+        PackageWriter._write_pkg_rels(escritor, pacote.rels)
+        PackageWriter._write_parts(escritor, partes)
+
 def replace_text_in_doc(doc, replacements: dict):
     """
     Substitui placeholders (ex: {{chave}}) em parágrafos e tabelas do documento.
@@ -296,34 +656,63 @@ def replace_text_in_doc(doc, replacements: dict):
     Percorre todo o documento Word procurando por placeholders no formato
     {{nome_variavel}} e substitui pelos valores correspondentes.
     
+    Cada parágrafo do corpo (inclusive os de células e tabelas aninhadas) é
+    visitado uma única vez, direto no XML. O texto substituído fica no
+    primeiro run do parágrafo, que mantém a sua formatação; os demais runs
+    ficam vazios.
+    
     Args:
         doc (docx.Document): Documento Word a ser modificado
         replacements (dict): Dicionário de substituições
             Chave: placeholder (ex: '{{total_contatos}}')
             Valor: texto de substituição (ex: '1.234')
     """
-    # Substitui em parágrafos
-    for p in doc.paragraphs:
-        # Reconstrói o texto completo do parágrafo (necessário pois pode estar fragmentado em runs)
-        full_text = "".join(run.text for run in p.runs)
+    from docx.oxml.ns import qn
+    
+    if not replacements:
+        return
+    
+    # Um único padrão com todos os placeholders, compilado uma vez por
+    # conjunto de chaves (todos os relatórios usam o mesmo conjunto)
+    padrao = _padrao_placeholders(tuple(replacements))
+    substituir = lambda m: str(replacements[m.group(0)])
+    atributo_space = qn("xml:space")
+    
+    for p in doc.element.body.iter(qn("w:p")):
+        # Textos dos runs do parágrafo (o placeholder pode estar fragmentado)
+        textos = p.xpath("./w:r/w:t")
+        if not textos:
+            continue
+        
+        full_text = "".join(t.text or "" for t in textos)
+        novo_texto = padrao.sub(substituir, full_text)
+        if novo_texto == full_text:
+            continue
         
-        # Verifica se algum placeholder está presente
-        if any(key in full_text for key in replacements):
-            # Substitui todos os placeholders
-            for key, value in replacements.items():
-                if key in full_text:
-                    full_text = full_text.replace(key, str(value))
-            
-            # Limpa o parágrafo e reescreve com texto substituído
-            p.clear()
-            p.add_run(full_text)
-    
-    # Substitui em tabelas (caso existam placeholders em células)
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                # Recursivamente substitui texto nas células
-                replace_text_in_doc(cell, replacements)
+        textos[0].text = novo_texto
+        if novo_texto != novo_texto.strip():
+            textos[0].set(atributo_space, "preserve")
+        for t in textos[1:]:
+            t.text = ""
+
+@lru_cache(maxsize=8)
+def _padrao_placeholders(chaves: tuple) -> re.Pattern:
+    """
+    Compila a regex que encontra qualquer um dos placeholders (usada por
+    replace_text_in_doc).
+    
+    As chaves mais longas vêm primeiro na alternância, para que um
+    placeholder nunca "roube" o prefixo de outro.
+    
+    Args:
+        chaves (tuple): Placeholders, na ordem do dicionário de substituições
+    
+    Returns:
+        re.Pattern: Padrão compilado
+    """
+    return re.compile("|".join(
+        re.escape(chave) for chave in sorted(chaves, key=len, reverse=True)
+    ))
 
 def popular_tabela_geral(doc, df_dados: pd.DataFrame, table_index: int):
     """
@@ -340,16 +729,15 @@ def popular_tabela_geral(doc, df_dados: pd.DataFrame, table_index: int):
         df_dados (pd.DataFrame): DataFrame com os dados a serem inseridos
         table_index (int): Índice da tabela no documento (0 para primeira tabela)
     """
-    from docx.shared import Pt
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.oxml.ns import qn
     
     # Validações iniciais
     if df_dados is None or df_dados.empty:
-        logger.warning(f"Nenhum dado disponível para popular a tabela geral (índice {table_index}).")
+        logger.warning("Nenhum dado disponível para popular a tabela geral (índice %s).", table_index)
         return
     
     if len(doc.tables) <= table_index:
-        logger.error(f"Erro: O template não contém a tabela de índice {table_index}.")
+        logger.error("Erro: O template não contém a tabela de índice %s.", table_index)
         return
     
     tabela = doc.tables[table_index]
@@ -357,20 +745,9 @@ def popular_tabela_geral(doc, df_dados: pd.DataFrame, table_index: int):
     # Define a coluna de identificação (primeira coluna do DataFrame)
     coluna_id = df_dados.columns[0]
     
-    logger.info(f"=== POPULAR_TABELA_GERAL ===")
-    logger.info(f"Coluna ID: {coluna_id}")
-    logger.info(f"Total de linhas: {len(df_dados)}")
-    
-    # Cria cópia do DataFrame para não modificar o original
-    df_tabela = df_dados.copy()
-    
-    # ========================================================================
-    # CÁLCULO DE COLUNAS DERIVADAS
-    # ========================================================================
-    df_tabela['pendentes'] = df_tabela['qtd_leads'] - df_tabela['convite_enviado']
-    df_tabela['sem_resposta'] = (df_tabela['convite_enviado'] - 
-                                   df_tabela['convite_confirmado'] - 
-                                   df_tabela['convite_declinado_confirmacao'])
+    logger.info("=== POPULAR_TABELA_GERAL ===")
+    logger.info("Coluna ID: %s", coluna_id)
+    logger.info("Total de linhas: %s", len(df_dados))
     
     # ========================================================================
     # DEFINIÇÃO DA ORDEM DAS COLUNAS
@@ -385,57 +762,128 @@ def popular_tabela_geral(doc, df_dados: pd.DataFrame, table_index: int):
         'convite_declinado_confirmacao',
         'sem_resposta'
     ]
+    colunas_derivadas = ('pendentes', 'sem_resposta')
+    colunas_origem = [col for col in colunas_ordenadas if col not in colunas_derivadas]
     
     # Valida se todas as colunas existem
-    colunas_faltando = [col for col in colunas_ordenadas if col not in df_tabela.columns]
+    colunas_faltando = [col for col in colunas_origem if col not in df_dados.columns]
     if colunas_faltando:
-        logger.error(f"ERRO: Colunas faltando: {colunas_faltando}")
+        logger.error("ERRO: Colunas faltando: %s", colunas_faltando)
         return
     
-    # Seleciona apenas as colunas necessárias
-    df_tabela = df_tabela[colunas_ordenadas]
+    # ========================================================================
+    # ORDENAÇÃO DAS LINHAS
+    # ========================================================================
+    # Ordena pela primeira coluna com um argsort (estável) só da coluna de
+    # identificação; as demais colunas são apenas reindexadas por essa ordem,
+    # sem copiar nem ordenar um DataFrame. Ausentes vão para o fim, como no
+    # sort_values
+    ids = df_dados[coluna_id]
+    ausentes = ids.isna().to_numpy()
+    presentes = np.flatnonzero(~ausentes)
+    ordem = np.concatenate([
+        presentes[np.argsort(ids.to_numpy()[presentes], kind='stable')],
+        np.flatnonzero(ausentes)
+    ])
+    
+    # ========================================================================
+    # CÁLCULO DE COLUNAS DERIVADAS
+    # ========================================================================
+    # Direto nos arrays NumPy das colunas, sem alinhamento de índices
+    colunas = {col: df_dados[col] for col in colunas_origem}
+    enviados = colunas['convite_enviado'].to_numpy()
+    colunas['pendentes'] = pd.Series(
+        np.subtract(colunas['qtd_leads'].to_numpy(), enviados)
+    )
+    colunas['sem_resposta'] = pd.Series(np.subtract(
+        np.subtract(enviados, colunas['convite_confirmado'].to_numpy()),
+        colunas['convite_declinado_confirmacao'].to_numpy()
+    ))
     
-    # Ordena por nome da primeira coluna
-    df_tabela = df_tabela.sort_values(by=coluna_id)
+    # ========================================================================
+    # CONVERSÃO DOS VALORES PARA TEXTO
+    # ========================================================================
+    # Feita coluna a coluna (vetorizada), e não célula a célula: ausentes
+    # viram "0" e números são exibidos como inteiros. Cada coluna de texto
+    # já sai na ordem final das linhas. As colunas de texto passam por
+    # object antes do fillna: numa coluna 'category' o 0 não é uma categoria
+    # válida e o fillna falharia
+    textos_por_coluna = [
+        (
+            colunas[coluna].fillna(0).astype('int64').astype(str)
+            if pd.api.types.is_numeric_dtype(colunas[coluna])
+            else colunas[coluna].astype(object).fillna(0).astype(str)
+        ).to_numpy()[ordem]
+        for coluna in colunas_ordenadas
+    ]
+    textos = list(zip(*textos_por_coluna))
     
-    logger.info(f"Primeira linha: {df_tabela.iloc[0].to_dict()}")
+    # O dicionário da primeira linha só é montado se o INFO for registrado
+    if textos and logger.isEnabledFor(logging.INFO):
+        logger.info("Primeira linha: %s", dict(zip(colunas_ordenadas, textos[0])))
     
     # ========================================================================
     # PREENCHIMENTO DA TABELA COM FORMATAÇÃO
     # ========================================================================
-    for _, row_data in df_tabela.iterrows():
-        # Adiciona nova linha na tabela
-        nova_linha = tabela.add_row().cells
+    # A formatação fica em uma linha modelo (<w:tr>), montada no primeiro
+    # relatório do processo e reaproveitada nos seguintes (todos vêm do mesmo
+    # template); as linhas de dados são cópias do XML dessa linha, com o
+    # texto de cada célula escrito diretamente no nó <w:t>
+    tr_modelo = _LINHAS_MODELO.get(table_index)
+    if tr_modelo is None:
+        tr_modelo = _LINHAS_MODELO[table_index] = _criar_linha_modelo(tabela)
+    
+    tbl = tabela._tbl
+    for linha in textos:
+        novo_tr = copy.deepcopy(tr_modelo)
+        for t, texto in zip(novo_tr.iter(qn('w:t')), linha):
+            t.text = texto
+        tbl.append(novo_tr)
+    
+    logger.info("Tabela geral: %s linhas inseridas com formatação!", len(textos))
+    logger.info("=== FIM POPULAR_TABELA_GERAL ===")
+
+def _criar_linha_modelo(tabela):
+    """
+    Monta a linha modelo (formatada) da tabela geral.
+    
+    A linha é criada pelo python-docx (larguras das células conforme a grade
+    da tabela), formatada (centralizada, Arial 9) e retirada da tabela em
+    seguida: o elemento devolvido não pertence a nenhum documento e só é
+    usado como origem das cópias em popular_tabela_geral.
+    
+    Args:
+        tabela (docx.table.Table): Tabela geral do template
+    
+    Returns:
+        CT_Row: Elemento <w:tr> da linha modelo, com "0" em cada célula
+    """
+    from docx.shared import Pt
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.oxml.ns import qn
+    
+    linha_modelo = tabela.add_row()
+    for celula in linha_modelo.cells:
+        # Texto provisório: garante um nó <w:t> em cada célula da linha modelo
+        celula.text = "0"
+        paragrafo = celula.paragraphs[0]
+        
+        # Centraliza o texto
+        paragrafo.alignment = WD_ALIGN_PARAGRAPH.CENTER
         
-        # Preenche cada célula da linha
-        for i, coluna in enumerate(colunas_ordenadas):
-            valor = row_data[coluna]
-            
-            # Converte para string, formatando números como inteiros
-            if pd.isna(valor):
-                texto = "0"
-            elif isinstance(valor, (int, float)):
-                texto = str(int(valor))
-            else:
-                texto = str(valor)
-            
-            # Define o texto na célula
-            nova_linha[i].text = texto
-            
-            # Aplica formatação ao parágrafo da célula
-            if len(nova_linha[i].paragraphs) > 0:
-                paragrafo = nova_linha[i].paragraphs[0]
-                
-                # Centraliza o texto
-                paragrafo.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                
-                # Aplica formatação à fonte (Arial, tamanho 9)
-                for run in paragrafo.runs:
-                    run.font.name = 'Arial'
-                    run.font.size = Pt(9)
-    
-    logger.info(f"Tabela geral: {len(df_tabela)} linhas inseridas com formatação!")
-    logger.info(f"=== FIM POPULAR_TABELA_GERAL ===")
+        # Aplica formatação à fonte (Arial, tamanho 9)
+        for run in paragrafo.runs:
+            run.font.name = 'Arial'
+            run.font.size = Pt(9)
+    
+    tr_modelo = linha_modelo._tr
+    for t in tr_modelo.iter(qn('w:t')):
+        # Preserva espaços nas pontas do texto (ex: nomes com espaço final)
+        t.set(qn('xml:space'), 'preserve')
+    
+    # A linha modelo não contém dados: sai da tabela
+    tabela._tbl.remove(tr_modelo)
+    return tr_modelo
 
 def safe_division(numerator, denominator):
     """
@@ -459,6 +907,106 @@ def safe_division(numerator, denominator):
     """
     return numerator / denominator if denominator != 0 else 0.0
 
+def _fmt_int(valor) -> str:
+    """
+    Formata um inteiro com o separador de milhares brasileiro (ponto).
+    
+    Não depende da localização do sistema (locale), que pode nem ter o
+    pt_BR instalado.
+    
+    Example:
+        >>> _fmt_int(1234567)
+        '1.234.567'
+    """
+    return f"{int(valor):,}".replace(',', '.')
+
+def _fmt_pct(razao) -> str:
+    """
+    Formata uma razão como percentual com 2 casas e vírgula decimal.
+    
+    Example:
+        >>> _fmt_pct(0.8)
+        '80,00'
+    """
+    return f"{razao * 100:.2f}".replace('.', ',')
+
+def _buscar_linha(df: pd.DataFrame, coluna: str, valor) -> pd.Series:
+    """
+    Retorna a primeira linha de df em que df[coluna] == valor.
+    
+    Nas visões indexadas por carregar_dados (índice igual à coluna), a busca
+    é feita direto no índice; nos demais DataFrames, por máscara booleana.
+    
+    Args:
+        df (pd.DataFrame): Visão onde buscar
+        coluna (str): Coluna de identificação
+        valor: Valor procurado
+    
+    Returns:
+        pd.Series: Linha encontrada
+    
+    Raises:
+        ValueError: Se nenhuma linha tiver o valor procurado
+    """
+    try:
+        if isinstance(df.index, pd.RangeIndex):
+            return df[df[coluna] == valor].iloc[0]
+        return df.loc[[valor]].iloc[0]
+    except (KeyError, IndexError):
+        raise ValueError(f"Valor '{valor}' não encontrado na coluna '{coluna}'.") from None
+
+def _tabela_regioes(dados: dict, valor_filtro, config: dict) -> pd.DataFrame:
+    """Tabela geral do Nacional: TODAS as regiões."""
+    return dados.get("visao_regional")
+
+def _tabela_setores(dados: dict, valor_filtro, config: dict) -> pd.DataFrame:
+    """Tabela geral do Regional: os setores da região (ou TODOS, no acumulado)."""
+    df_setor = dados.get("visao_setor")
+    if not valor_filtro:
+        return df_setor
+    
+    rid_to_sids = dados.get('_rid_to_sids')
+    if rid_to_sids is not None:
+        setores_da_regiao = rid_to_sids.get(valor_filtro, [])
+    else:
+        df_pdv_da_regiao = dados.get("visao_pdv")[dados.get("visao_pdv")['rid'] == valor_filtro]
+        setores_da_regiao = df_pdv_da_regiao['sid'].unique()
+    return df_setor[df_setor['sid'].isin(setores_da_regiao)]
+
+def _tabela_pdvs(dados: dict, valor_filtro, config: dict) -> pd.DataFrame:
+    """Tabela geral de Setor/Grupo/Marca: os PDVs do filtro (ou TODOS)."""
+    df_pdv = dados.get("visao_pdv")
+    if not valor_filtro:
+        return df_pdv
+    
+    # A coluna de identificação da visão do tipo (ex: 'sid') também existe
+    # na visão PDV
+    coluna_filtro_pa = dados.get(config['visao']).columns[0]
+    return df_pdv[df_pdv[coluna_filtro_pa] == valor_filtro]
+
+def _tabela_vendedores(dados: dict, valor_filtro, config: dict) -> pd.DataFrame:
+    """Tabela geral do Por PDV: TODOS os vendedores do PDV."""
+    df_vendedor = dados.get("visao_vendedor")
+    pdv_to_vendedores = dados.get('_pdv_to_vendedores')
+    if pdv_to_vendedores is not None:
+        return df_vendedor.iloc[pdv_to_vendedores.get(valor_filtro, [])]
+    return df_vendedor[df_vendedor['pdv'] == valor_filtro]
+
+# Especialização de cada tipo de relatório, resolvida uma única vez:
+#   - visao: DataFrame do tipo (opções de filtro e linha do relatório
+#     específico)
+#   - rotulo: nome do tipo nos títulos (sem o "Por ")
+#   - categoria: título da coluna de identificação na tabela geral
+#   - tabela: função (dados, valor_filtro, config) -> DataFrame da tabela geral
+_TIPO_CONFIG = {
+    "Nacional":  {"visao": "visao_nacional", "rotulo": "Nacional", "categoria": "Região",   "tabela": _tabela_regioes},
+    "Regional":  {"visao": "visao_regional", "rotulo": "Regional", "categoria": "Setor",    "tabela": _tabela_setores},
+    "Por Setor": {"visao": "visao_setor",    "rotulo": "Setor",    "categoria": "PDV",      "tabela": _tabela_pdvs},
+    "Por Grupo": {"visao": "visao_grupo",    "rotulo": "Grupo",    "categoria": "PDV",      "tabela": _tabela_pdvs},
+    "Por Marca": {"visao": "visao_marca",    "rotulo": "Marca",    "categoria": "PDV",      "tabela": _tabela_pdvs},
+    "Por PDV":   {"visao": "visao_pdv",      "rotulo": "PDV",      "categoria": "Vendedor", "tabela": _tabela_vendedores},
+}
+
 def _preparar_contexto_relatorio(tipo: str, dados: dict, contexto_evento: dict, 
                                   valor_filtro: str = None, data_inicio_br: str = None, 
                                   data_fim_br: str = None):
@@ -484,114 +1032,84 @@ def _preparar_contexto_relatorio(tipo: str, dados: dict, contexto_evento: dict,
             - contexto (dict): Dicionário com todos os placeholders e valores
             - df_tabela_geral (pd.DataFrame): DataFrame para a tabela detalhada
     """
+    config = _TIPO_CONFIG.get(tipo)
+    if config is None:
+        raise ValueError(f"Tipo de relatório '{tipo}' inválido. Use um de: {', '.join(_TIPO_CONFIG)}")
+    
     # ========================================================================
     # SELEÇÃO DE DADOS PRINCIPAIS
     # ========================================================================
-    dados_relatorio = None
-    titulo_visao = tipo
-    
     if valor_filtro:
         # Relatório específico (ex: Regional SUDESTE)
-        nome_df_base = f"visao_{tipo.lower().replace('por ', '')}"
-        df_base = dados.get(nome_df_base)
-        coluna_filtro = list(df_base.columns)[0]
-        dados_relatorio = df_base[df_base[coluna_filtro] == valor_filtro].iloc[0]
-        titulo_visao = f"{tipo.replace('Por ','')} - {valor_filtro}"
+        df_base = dados.get(config['visao'])
+        coluna_filtro = df_base.columns[0]
+        dados_relatorio = _buscar_linha(df_base, coluna_filtro, valor_filtro)
+        titulo_visao = f"{config['rotulo']} - {valor_filtro}"
     else: 
         # Relatório acumulado (ex: Regional Acumulado)
         df_nacional = dados.get("visao_nacional")
         dados_relatorio = df_nacional.iloc[0]
-        titulo_visao = f"{tipo.replace('Por ','')} (Acumulado)"
-        if tipo == "Nacional": 
-            titulo_visao = "Nacional"
-
-    if dados_relatorio is None:
-        raise ValueError(
-            f"Não foram encontrados dados para a seleção: Tipo='{tipo}', Filtro='{valor_filtro}'"
-        )
+        titulo_visao = "Nacional" if tipo == "Nacional" else f"{config['rotulo']} (Acumulado)"
 
     # ========================================================================
     # SELEÇÃO DE DADOS PARA TABELA GERAL
     # ========================================================================
-    df_tabela_geral = None
-    nome_coluna_tabela_geral = "Categoria"
-    
-    if tipo == 'Nacional':
-        # Tabela Geral: TODAS as regiões
-        df_tabela_geral = dados.get("visao_regional")
-        nome_coluna_tabela_geral = "Região"
-        
-    elif tipo == 'Regional':
-        if valor_filtro:
-            # Regional Específico - TODOS os setores da região
-            df_setor = dados.get("visao_setor")
-            df_pdv_da_regiao = dados.get("visao_pdv")[dados.get("visao_pdv")['rid'] == valor_filtro]
-            setores_da_regiao = df_pdv_da_regiao['sid'].unique()
-            df_tabela_geral = df_setor[df_setor['sid'].isin(setores_da_regiao)]
-            nome_coluna_tabela_geral = "Setor"
-        else:
-            # Regional Acumulado - TODOS os setores
-            df_tabela_geral = dados.get("visao_setor")
-            nome_coluna_tabela_geral = "Setor"
-            
-    elif tipo in ['Por Setor', 'Por Grupo', 'Por Marca']:
-        df_pdv = dados.get("visao_pdv")
-        nome_df_base = f"visao_{tipo.lower().replace('por ', '')}"
-        coluna_filtro_pa = list(dados.get(nome_df_base).columns)[0]
-        
-        if valor_filtro:
-            # Filtro específico - TODOS os PDVs do filtro
-            df_tabela_geral = df_pdv[df_pdv[coluna_filtro_pa] == valor_filtro]
-        else:
-            # Acumulado - TODOS os PDVs
-            df_tabela_geral = df_pdv
-            
-        nome_coluna_tabela_geral = "PDV"
-        
-    elif tipo == 'Por PDV':
-        # TODOS os vendedores do PDV específico
-        df_vendedor = dados.get("visao_vendedor")
-        df_tabela_geral = df_vendedor[df_vendedor['pdv'] == valor_filtro]
-        nome_coluna_tabela_geral = "Vendedor"
+    df_tabela_geral = config['tabela'](dados, valor_filtro, config)
+    nome_coluna_tabela_geral = config['categoria']
         
     # ========================================================================
     # CÁLCULO DE MÉTRICAS
     # ========================================================================
-    total_enviados = dados_relatorio['convite_enviado']
-    total_confirmados = dados_relatorio['convite_confirmado']
-    total_presencas = dados_relatorio['presenca']
-    total_testdrives = dados_relatorio['testdrive']
-    total_vendas = dados_relatorio['venda']
+    # A linha vira um dict uma única vez: cada acesso a um dict custa bem
+    # menos que um __getitem__ de Series
+    d = dados_relatorio.to_dict()
+    total_leads = d['qtd_leads']
+    total_enviados = d['convite_enviado']
+    total_confirmados = d['convite_confirmado']
+    total_declinados = d['convite_declinado_confirmacao']
+    total_presencas = d['presenca']
+    total_testdrives = d['testdrive']
+    total_vendas = d['venda']
+    
+    # Métricas derivadas
+    total_nao_vistos = total_leads - d['leads_visualizado']
+    total_envio_pendente = total_leads - total_enviados
+    total_sem_resposta = total_enviados - total_confirmados - total_declinados
 
     # ========================================================================
     # PREPARAÇÃO DO CONTEXTO DE SUBSTITUIÇÃO
     # ========================================================================
+    # (placeholder, valor bruto, formatador): todos os números passam pelos
+    # mesmos formatadores, sem chamadas ao locale
+    metricas = [
+        # Métricas absolutas (formatadas com separador de milhares)
+        ("{{total_contatos}}", total_leads, _fmt_int),
+        ("{{total_nao_vistos}}", total_nao_vistos, _fmt_int),
+        ("{{total_enviados}}", total_enviados, _fmt_int),
+        ("{{total_envio_pendente}}", total_envio_pendente, _fmt_int),
+        ("{{total_confirmados}}", total_confirmados, _fmt_int),
+        ("{{total_declinados}}", total_declinados, _fmt_int),
+        ("{{total_sem_resposta}}", total_sem_resposta, _fmt_int),
+        ("{{total_vendedores}}", d.get('qtd_vendedores', 0), _fmt_int),
+        ("{{total_presencas}}", total_presencas, _fmt_int),
+        ("{{total_testdrives}}", total_testdrives, _fmt_int),
+        ("{{total_vendas}}", total_vendas, _fmt_int),
+        
+        # Percentuais de conversão (formatados com vírgula decimal)
+        ("{{perc_enviados_confirmados}}", safe_division(total_confirmados, total_enviados), _fmt_pct),
+        ("{{perc_confirmados_presencas}}", safe_division(total_presencas, total_confirmados), _fmt_pct),
+        ("{{perc_presencas_testdrives}}", safe_division(total_testdrives, total_presencas), _fmt_pct),
+        ("{{perc_presencas_vendas}}", safe_division(total_vendas, total_presencas), _fmt_pct),
+        ("{{perc_testdrives_vendas}}", safe_division(total_vendas, total_testdrives), _fmt_pct),
+    ]
+    
     contexto = {
         "{{nome_evento}}": contexto_evento['event_name'],
         "{{data_inicio}}": data_inicio_br if data_inicio_br else "N/A",
         "{{data_fim}}": data_fim_br if data_fim_br else "N/A",
         "{{tipo_visao}}": titulo_visao,
         "{{categoria_visao}}": nome_coluna_tabela_geral,
-        
-        # Métricas absolutas (formatadas com separador de milhares)
-        "{{total_contatos}}": locale.format_string("%d", dados_relatorio['qtd_leads'], grouping=True),
-        "{{total_nao_vistos}}": locale.format_string("%d", dados_relatorio['qtd_leads'] - dados_relatorio['leads_visualizado'], grouping=True),
-        "{{total_enviados}}": locale.format_string("%d", total_enviados, grouping=True),
-        "{{total_envio_pendente}}": locale.format_string("%d", dados_relatorio['qtd_leads'] - total_enviados, grouping=True),
-        "{{total_confirmados}}": locale.format_string("%d", total_confirmados, grouping=True),
-        "{{total_declinados}}": locale.format_string("%d", dados_relatorio['convite_declinado_confirmacao'], grouping=True),
-        "{{total_sem_resposta}}": locale.format_string("%d", total_enviados - total_confirmados - dados_relatorio['convite_declinado_confirmacao'], grouping=True),
-        "{{total_vendedores}}": locale.format_string("%d", dados_relatorio.get('qtd_vendedores', 0), grouping=True),
-        "{{total_presencas}}": locale.format_string("%d", total_presencas, grouping=True),
-        "{{total_testdrives}}": locale.format_string("%d", total_testdrives, grouping=True),
-        "{{total_vendas}}": locale.format_string("%d", total_vendas, grouping=True),
-        
-        # Percentuais de conversão (formatados com vírgula decimal)
-        "{{perc_enviados_confirmados}}": f"{safe_division(total_confirmados, total_enviados) * 100:.2f}".replace('.',','),
-        "{{perc_confirmados_presencas}}": f"{safe_division(total_presencas, total_confirmados) * 100:.2f}".replace('.',','),
-        "{{perc_presencas_testdrives}}": f"{safe_division(total_testdrives, total_presencas) * 100:.2f}".replace('.',','),
-        "{{perc_presencas_vendas}}": f"{safe_division(total_vendas, total_presencas) * 100:.2f}".replace('.',','),
-        "{{perc_testdrives_vendas}}": f"{safe_division(total_vendas, total_testdrives) * 100:.2f}".replace('.',','),
+        **{chave: formatar(valor) for chave, valor, formatar in metricas},
     }
     
     return contexto, df_tabela_geral
@@ -1,10 +1,23 @@
 # Arquivo: tests/test_build_report.py
 
+import shutil
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+from types import SimpleNamespace
 import pandas as pd
+import pytest
 import logging
+from docx import Document
 
 # Importamos as funções que queremos testar (note o _ antes de _preparar_contexto_relatorio)
-from report.build_report import safe_division, _preparar_contexto_relatorio
+from report import build_report
+from report.build_report import (
+    safe_division, _preparar_contexto_relatorio, popular_tabela_geral, get_opcoes_especificas,
+    carregar_dados, converter_lote_pdf, replace_text_in_doc, _salvar_docx_sem_compressao,
+    _TIPO_CONFIG
+)
 
 # --- Testes para safe_division ---
 def test_safe_division_por_zero():
@@ -57,4 +70,217 @@ def test_preparar_contexto_relatorio_nacional():
     
     # Verifica se os dados para os Pontos de Atenção foram selecionados corretamente
     assert df_pa.shape[0] == 2 # Deve ter encontrado as 2 regiões
-    assert 'rid' in mapa_pa # O mapa de colunas deve ser para 'rid'
\ No newline at end of file
+    assert 'rid' in mapa_pa # O mapa de colunas deve ser para 'rid'
+# --- Testes para popular_tabela_geral ---
+def test_popular_tabela_geral_categoria_com_nulo(monkeypatch):
+    """Verifica se uma coluna de identificação 'category' com nulo vira "0" na tabela."""
+    logging.info("Executando teste: test_popular_tabela_geral_categoria_com_nulo")
+    monkeypatch.setattr(build_report, '_LINHAS_MODELO', {})
+
+    doc = Document()
+    doc.add_table(rows=1, cols=8)
+    df_dados = pd.DataFrame({
+        'rid': pd.Categorical(['SUL', None]),
+        'qtd_vendedores': [2, 1], 'qtd_leads': [10, 5], 'convite_enviado': [6, 3],
+        'convite_confirmado': [3, 1], 'convite_declinado_confirmacao': [1, 1],
+    })
+
+    popular_tabela_geral(doc, df_dados, 0)
+
+    linhas = [[celula.text for celula in linha.cells] for linha in doc.tables[0].rows[1:]]
+    assert linhas == [
+        ['SUL', '2', '10', '6', '4', '3', '1', '2'],
+        ['0', '1', '5', '3', '2', '1', '1', '1'],
+    ]
+
+# --- Testes para get_opcoes_especificas ---
+def test_get_opcoes_especificas_ignora_nulos_e_tipos_misturados():
+    """Verifica se as opções ignoram ausentes e ordenam colunas com números e textos."""
+    logging.info("Executando teste: test_get_opcoes_especificas_ignora_nulos_e_tipos_misturados")
+    dados = {
+        'visao_regional': pd.DataFrame({'rid': ['SUL', None, 'NORTE']}),
+        'visao_grupo': pd.DataFrame({'grupo': pd.Categorical(['Grupo B', 0, None, 'Grupo A'])}),
+    }
+    assert get_opcoes_especificas('Regional', dados) == ['NORTE', 'SUL']
+    assert get_opcoes_especificas('Por Grupo', dados) == [0, 'Grupo A', 'Grupo B']
+
+# --- Testes para carregar_dados ---
+def test_carregar_dados_isola_o_cache(monkeypatch, tmp_path):
+    """Verifica se alterar os dados devolvidos não afeta a próxima carga (cache)."""
+    logging.info("Executando teste: test_carregar_dados_isola_o_cache")
+    monkeypatch.setattr(build_report, 'DATA_DIR', tmp_path)
+    pd.DataFrame({'pdv': ['PDV A', 'PDV B'], 'rid': ['SUL', 'SUL'], 'sid': [10, 20],
+                  'qtd_leads': [1, 2]}).to_csv(tmp_path / "visao_pdv.csv", index=False)
+    pd.DataFrame({'nome_comercial': ['V1', 'V2', 'V3'], 'pdv': ['PDV A', 'PDV B', 'PDV A'],
+                  'qtd_leads': [1, 1, 1]}).to_csv(tmp_path / "visao_vendedor.csv", index=False)
+
+    dados = carregar_dados()
+    dados['visao_pdv'].loc['PDV A', 'qtd_leads'] = 99
+    dados['_rid_to_sids']['SUL'][0] = -1
+    dados['_pdv_to_vendedores']['PDV A'][0] = -1
+    del dados['_pdv_to_vendedores']['PDV B']
+
+    dados_cache = carregar_dados()
+    assert dados_cache['visao_pdv'].loc['PDV A', 'qtd_leads'] == 1
+    assert list(dados_cache['_rid_to_sids']['SUL']) == [10, 20]
+    assert list(dados_cache['_pdv_to_vendedores']['PDV A']) == [0, 2]
+    assert list(dados_cache['_pdv_to_vendedores']['PDV B']) == [1]
+
+# --- Testes para _salvar_docx_sem_compressao ---
+def test_salvar_docx_sem_compressao(tmp_path):
+    """Verifica se o DOCX sem compressão tem as mesmas partes do save do python-docx."""
+    logging.info("Executando teste: test_salvar_docx_sem_compressao")
+    doc = Document()
+    doc.add_paragraph("Relatório de teste")
+
+    doc.save(tmp_path / "padrao.docx")
+    _salvar_docx_sem_compressao(doc, tmp_path / "sem_compressao.docx")
+
+    with zipfile.ZipFile(tmp_path / "padrao.docx") as padrao, \
+            zipfile.ZipFile(tmp_path / "sem_compressao.docx") as sem_compressao:
+        assert sem_compressao.namelist() == padrao.namelist()
+        for membro in sem_compressao.infolist():
+            assert membro.compress_type == zipfile.ZIP_STORED
+            assert sem_compressao.read(membro) == padrao.read(membro.filename)
+    assert Document(tmp_path / "sem_compressao.docx").paragraphs[-1].text == "Relatório de teste"
+
+# --- Testes para converter_lote_pdf ---
+def test_converter_lote_pdf_usa_word_no_windows(monkeypatch, tmp_path):
+    """Verifica se no Windows o docx2pdf (Word) é usado mesmo com o LibreOffice no PATH."""
+    logging.info("Executando teste: test_converter_lote_pdf_usa_word_no_windows")
+    conversoes = []
+    monkeypatch.setitem(sys.modules, 'docx2pdf', SimpleNamespace(
+        convert=lambda origem, destino: conversoes.append((origem, destino))
+    ))
+    monkeypatch.setattr(sys, 'platform', 'win32')
+    monkeypatch.setattr(shutil, 'which', lambda nome: f'/usr/bin/{nome}')
+    monkeypatch.setattr(subprocess, 'run', lambda *args, **kwargs: pytest.fail("soffice chamado"))
+
+    caminhos_pdf = converter_lote_pdf([tmp_path / "Relatorio_Nacional.docx"])
+
+    assert caminhos_pdf == [tmp_path / "Relatorio_Nacional.pdf"]
+    assert conversoes == [(str(tmp_path / "Relatorio_Nacional.docx"), str(tmp_path / "Relatorio_Nacional.pdf"))]
+
+def test_converter_lote_pdf_usa_libreoffice_fora_do_windows(monkeypatch, tmp_path):
+    """Verifica se fora do Windows todos os DOCX vão para uma única chamada ao soffice."""
+    logging.info("Executando teste: test_converter_lote_pdf_usa_libreoffice_fora_do_windows")
+    chamadas = []
+    monkeypatch.setattr(sys, 'platform', 'linux')
+    monkeypatch.setattr(shutil, 'which', lambda nome: '/usr/bin/soffice' if nome == 'soffice' else None)
+    monkeypatch.setattr(subprocess, 'run', lambda comando, **kwargs: chamadas.append(comando))
+
+    caminhos_docx = [tmp_path / "Relatorio_Nacional.docx", tmp_path / "Relatorio_Regional.docx"]
+    caminhos_pdf = converter_lote_pdf(caminhos_docx)
+
+    assert caminhos_pdf == [caminho.with_suffix(".pdf") for caminho in caminhos_docx]
+    assert chamadas == [[
+        '/usr/bin/soffice', '--headless', '--convert-to', 'pdf', '--outdir', str(tmp_path),
+        *map(str, caminhos_docx)
+    ]]
+
+# --- Testes para o despacho por tipo (_TIPO_CONFIG) ---
+def _dados_por_tipo():
+    """Visões mínimas para todos os tipos de relatório (sem os índices de carregar_dados)."""
+    metricas = {
+        'qtd_vendedores': 1, 'qtd_leads': 10, 'leads_visualizado': 8, 'convite_enviado': 6,
+        'convite_pendente_confirmacao': 1, 'convite_declinado_confirmacao': 1,
+        'convite_confirmado': 4, 'presenca': 2, 'testdrive': 1, 'venda': 1,
+    }
+    df_pdv = pd.DataFrame([
+        {'pdv': 'PDV A', 'rid': 'SUL', 'sid': 10, 'grupo': 'Grupo A', 'marca': 'Marca X', **metricas},
+        {'pdv': 'PDV B', 'rid': 'SUL', 'sid': 20, 'grupo': 'Grupo B', 'marca': 'Marca X', **metricas},
+        {'pdv': 'PDV C', 'rid': 'NORTE', 'sid': 30, 'grupo': 'Grupo A', 'marca': 'Marca Y', **metricas},
+    ])
+    return {
+        'visao_nacional': pd.DataFrame([metricas]),
+        'visao_regional': pd.DataFrame([{'rid': rid, **metricas} for rid in ('SUL', 'NORTE')]),
+        'visao_setor': pd.DataFrame([{'sid': sid, **metricas} for sid in (10, 20, 30)]),
+        'visao_grupo': pd.DataFrame([{'grupo': grupo, **metricas} for grupo in ('Grupo A', 'Grupo B')]),
+        'visao_marca': pd.DataFrame([{'marca': marca, **metricas} for marca in ('Marca X', 'Marca Y')]),
+        'visao_pdv': df_pdv,
+        'visao_vendedor': pd.DataFrame([
+            {'nome_comercial': nome, 'pdv': pdv, **metricas}
+            for nome, pdv in (('V1', 'PDV A'), ('V2', 'PDV C'), ('V3', 'PDV A'))
+        ]),
+    }
+
+def test_preparar_contexto_relatorio_por_tipo():
+    """Verifica título, categoria e tabela geral de cada tipo da tabela de despacho."""
+    logging.info("Executando teste: test_preparar_contexto_relatorio_por_tipo")
+    dados = _dados_por_tipo()
+    casos = [
+        # (tipo, filtro, título, categoria, primeira coluna da tabela geral)
+        ("Nacional", None, "Nacional", "Região", ['SUL', 'NORTE']),
+        ("Regional", "SUL", "Regional - SUL", "Setor", [10, 20]),
+        ("Regional", None, "Regional (Acumulado)", "Setor", [10, 20, 30]),
+        ("Por Setor", 30, "Setor - 30", "PDV", ['PDV C']),
+        ("Por Grupo", "Grupo A", "Grupo - Grupo A", "PDV", ['PDV A', 'PDV C']),
+        ("Por Marca", "Marca X", "Marca - Marca X", "PDV", ['PDV A', 'PDV B']),
+        ("Por Marca", None, "Marca (Acumulado)", "PDV", ['PDV A', 'PDV B', 'PDV C']),
+        ("Por PDV", "PDV A", "PDV - PDV A", "Vendedor", ['V1', 'V3']),
+    ]
+    for tipo, filtro, titulo, categoria, linhas in casos:
+        contexto, df_tabela = _preparar_contexto_relatorio(
+            tipo, dados, {"event_name": "Evento de Teste"}, filtro, "01/08/2024", "31/08/2024"
+        )
+        assert contexto["{{tipo_visao}}"] == titulo
+        assert contexto["{{categoria_visao}}"] == categoria
+        assert contexto["{{total_contatos}}"] == "10"
+        assert contexto["{{total_sem_resposta}}"] == "1"
+        assert df_tabela.iloc[:, 0].tolist() == linhas
+    assert set(_TIPO_CONFIG) == set(build_report.TIPOS_RELATORIO)
+
+def test_preparar_contexto_relatorio_tipo_invalido():
+    """Verifica se um tipo fora da tabela de despacho gera ValueError."""
+    logging.info("Executando teste: test_preparar_contexto_relatorio_tipo_invalido")
+    with pytest.raises(ValueError):
+        _preparar_contexto_relatorio("Por Cidade", _dados_por_tipo(), {"event_name": "Evento"})
+    with pytest.raises(ValueError):
+        get_opcoes_especificas("Por Cidade", _dados_por_tipo())
+
+# --- Testes para replace_text_in_doc ---
+def test_replace_text_in_doc_placeholders_fragmentados_e_prefixos():
+    """Verifica placeholders divididos entre runs e chaves que são prefixo de outras."""
+    logging.info("Executando teste: test_replace_text_in_doc_placeholders_fragmentados_e_prefixos")
+    doc = Document()
+    paragrafo = doc.add_paragraph("Total: {{total")
+    paragrafo.add_run("}} de {{total_vendas}} ")
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "{{nome_evento}}"
+    doc.add_paragraph("Sem placeholders")
+
+    replace_text_in_doc(doc, {"{{total}}": "1.000", "{{total_vendas}}": 20, "{{nome_evento}}": "Liga"})
+
+    assert doc.paragraphs[0].text == "Total: 1.000 de 20 "
+    assert doc.paragraphs[0].runs[1].text == ""
+    assert doc.tables[0].cell(0, 0).text == "Liga"
+    assert doc.paragraphs[1].text == "Sem placeholders"
+
+def test_gerar_relatorio_docx_entrega_comprimido_e_converte_copia(monkeypatch, tmp_path):
+    """
+    Verifica se o DOCX entregue fica comprimido e se o conversor lê a cópia
+    temporária sem compressão, apagada após a conversão.
+    """
+    logging.info("Executando teste: test_gerar_relatorio_docx_entrega_comprimido_e_converte_copia")
+    monkeypatch.setattr(build_report, 'OUTPUT_DIR', tmp_path)
+    monkeypatch.setattr(build_report, '_LINHAS_MODELO', {})
+    lidos = []
+    def fake_run(comando, **kwargs):
+        with zipfile.ZipFile(comando[-1]) as copia:
+            lidos.append((Path(comando[-1]), {m.compress_type for m in copia.infolist()}))
+    monkeypatch.setattr(sys, 'platform', 'linux')
+    monkeypatch.setattr(shutil, 'which', lambda nome: '/usr/bin/soffice' if nome == 'soffice' else None)
+    monkeypatch.setattr(subprocess, 'run', fake_run)
+
+    caminho_docx = build_report.gerar_relatorio_docx(
+        "Nacional", _dados_por_tipo(), {"event_name": "Evento de Teste"}, None, "01/08/2024", "31/08/2024"
+    )
+    with zipfile.ZipFile(caminho_docx) as entregue:
+        assert zipfile.ZIP_DEFLATED in {m.compress_type for m in entregue.infolist()}
+
+    converter_lote_pdf([caminho_docx])
+
+    (copia, compressoes), = lidos
+    assert copia != caminho_docx and copia.name == caminho_docx.name
+    assert compressoes == {zipfile.ZIP_STORED}
+    assert not copia.parent.exists()
+    assert caminho_docx in tmp_path.iterdir()
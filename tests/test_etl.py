@@ -1,11 +1,13 @@
 # Arquivo: tests/test_etl.py
 
 import pandas as pd
+import pyarrow.parquet as pq
 from pandas.testing import assert_frame_equal
 import logging
 
 # Importa a função que queremos testar (com o caminho corrigido)
-from etl.etl import executar_etl
+from etl.etl import executar_etl, METRICAS, ORDEM_PDV, _BOM_VIEWS, _salvar_csv
+from report.build_report import carregar_dados, get_opcoes_especificas
 
 def test_agregacao_regional():
     """
@@ -62,9 +64,10 @@ def test_executar_etl_gera_todos_os_csvs(monkeypatch, tmp_path):
     df_fake_db_return = pd.DataFrame(dados_teste_completos)
 
     # Cria uma função "mock" (falsa) que substituirá a 'run_query' real
-    def mock_run_query(sql_query: str):
+    # (o ETL lê o resultado em lotes, então o mock devolve um iterador de lotes)
+    def mock_run_query(sql_query: str, params: dict = None, chunksize: int = None):
         logging.info("CHAMADA MOCK: run_query foi interceptada e retornou dados de teste.")
-        return df_fake_db_return
+        return iter([df_fake_db_return])
 
     # Usa o monkeypatch para substituir a função real pela nossa versão falsa
     monkeypatch.setattr('etl.etl.run_query', mock_run_query)
@@ -74,7 +77,11 @@ def test_executar_etl_gera_todos_os_csvs(monkeypatch, tmp_path):
     monkeypatch.setattr('etl.etl.output_dir', output_dir_teste)
 
     # 2. Execução
-    executar_etl(db_evento_selecionado="banco_de_teste")
+    executar_etl(
+        db_evento_selecionado="banco_de_teste",
+        data_inicio="2025-09-01",
+        data_fim="2025-09-30"
+    )
 
     # 3. Verificação (Asserts)
     logging.info(f"Verificando arquivos na pasta temporária: {output_dir_teste}")
@@ -85,4 +92,206 @@ def test_executar_etl_gera_todos_os_csvs(monkeypatch, tmp_path):
     assert (output_dir_teste / "visao_marca.csv").exists()
     assert (output_dir_teste / "visao_setor.csv").exists()
     assert (output_dir_teste / "visao_nacional.csv").exists()
-    logging.info("Teste de integração finalizado com sucesso. Todos os arquivos foram criados.")
\ No newline at end of file
+    logging.info("Teste de integração finalizado com sucesso. Todos os arquivos foram criados.")
+def test_executar_etl_chaves_nulas_viram_zero(monkeypatch, tmp_path):
+    """
+    Verifica se chaves nulas (rid, sid, grupo, marca, pdv) são gravadas como 0,
+    e se as opções do menu do relatório continuam ordenáveis.
+    """
+    logging.info("Iniciando teste: test_executar_etl_chaves_nulas_viram_zero")
+
+    df_fake_db_return = pd.DataFrame({
+        'nome_comercial': ['Vendedor 1', 'Vendedor 2', 'Vendedor 3'],
+        'rid': ['SUL', None, 'SUL'], 'sid': [10, None, 20],
+        'grupo': ['Grupo A', 'Grupo B', None], 'marca': [None, 'Marca Y', 'Marca X'],
+        'pdv': ['PDV A', None, 'PDV C'], 'prospector_id': [101, 202, 303],
+        **{metrica: [1, 2, None] for metrica in METRICAS},
+    })
+    monkeypatch.setattr('etl.etl.run_query', lambda *args, **kwargs: iter([df_fake_db_return]))
+    monkeypatch.setattr('etl.etl.output_dir', tmp_path)
+
+    executar_etl("banco_de_teste", "2025-09-01", "2025-09-30")
+
+    monkeypatch.setattr('report.build_report.DATA_DIR', tmp_path)
+    dados = carregar_dados()
+
+    assert get_opcoes_especificas("Regional", dados) == ['0', 'SUL']
+    assert get_opcoes_especificas("Por Grupo", dados) == ['0', 'Grupo A', 'Grupo B']
+    assert get_opcoes_especificas("Por Marca", dados) == ['0', 'Marca X', 'Marca Y']
+    assert get_opcoes_especificas("Por Setor", dados) == [0, 10, 20]
+    assert get_opcoes_especificas("Por PDV", dados) == ['0', 'PDV A', 'PDV C']
+    assert dados['visao_nacional']['qtd_leads'].iloc[0] == 3
+    logging.info("Teste finalizado com sucesso.")
+
+def test_executar_etl_em_lotes_igual_a_lote_unico(monkeypatch, tmp_path):
+    """
+    Verifica se a agregação lote a lote gera as mesmas visões (valores e
+    schema do Parquet) que a leitura do resultado em um único lote.
+    """
+    logging.info("Iniciando teste: test_executar_etl_em_lotes_igual_a_lote_unico")
+
+    df_fake_db_return = pd.DataFrame({
+        'nome_comercial': [f'Vendedor {i}' for i in range(12)],
+        'rid': ['SUL', 'SUDESTE', 'NORTE'] * 4, 'sid': [10, 20, 30, 40] * 3,
+        'grupo': ['Grupo A', 'Grupo B'] * 6, 'marca': ['Marca X'] * 6 + ['Marca Y'] * 6,
+        'pdv': [f'PDV {i % 5}' for i in range(12)], 'prospector_id': list(range(12)),
+        **{metrica: list(range(12)) for metrica in METRICAS},
+    })
+
+    def mock_run_query(sql_query: str, params: dict = None, chunksize: int = None):
+        return (df_fake_db_return.iloc[i:i + chunksize].reset_index(drop=True)
+                for i in range(0, len(df_fake_db_return), chunksize))
+    monkeypatch.setattr('etl.etl.run_query', mock_run_query)
+
+    pastas = {}
+    for tamanho_lote in (50_000, 5):
+        pastas[tamanho_lote] = tmp_path / str(tamanho_lote)
+        monkeypatch.setattr('etl.etl.TAMANHO_LOTE', tamanho_lote)
+        monkeypatch.setattr('etl.etl.output_dir', pastas[tamanho_lote])
+        executar_etl("banco_de_teste", "2025-09-01", "2025-09-30", formato="parquet")
+
+    for arquivo in pastas[50_000].glob("*.parquet"):
+        tabela_unica = pq.read_table(arquivo)
+        tabela_lotes = pq.read_table(pastas[5] / arquivo.name)
+        assert tabela_lotes.schema.equals(tabela_unica.schema, check_metadata=False)
+        df_unico = tabela_unica.to_pandas()
+        df_lotes = tabela_lotes.to_pandas()
+        colunas = list(df_unico.columns)
+        assert_frame_equal(
+            df_lotes.sort_values(colunas, ignore_index=True),
+            df_unico.sort_values(colunas, ignore_index=True),
+        )
+    assert pd.read_parquet(pastas[5] / "visao_setor.parquet")['sid'].dtype == 'int64'
+    assert pd.read_parquet(pastas[5] / "visao_nacional.parquet")['qtd_leads'].iloc[0] == 66
+    logging.info("Teste finalizado com sucesso.")
+
+def test_executar_etl_csvs_iguais_ao_to_csv(monkeypatch, tmp_path):
+    """
+    Verifica se os CSVs gravados em lotes pelo PyArrow têm os mesmos bytes
+    que o `to_csv` do pandas geraria (aspas, ordem das linhas e BOM).
+    """
+    logging.info("Iniciando teste: test_executar_etl_csvs_iguais_ao_to_csv")
+
+    df_fake_db_return = pd.DataFrame({
+        'nome_comercial': ['Silva, João', 'Ana "Aninha"'] + [f'Vendedor {i}' for i in range(10)],
+        'rid': ['SUL', 'SUDESTE', 'NORTE'] * 4, 'sid': [30, 20, 10, 40] * 3,
+        'grupo': ['Grupo B', 'Grupo A'] * 6, 'marca': ['Marca Y'] * 6 + ['Marca X'] * 6,
+        'pdv': [f'PDV {i % 5}' for i in range(12)], 'prospector_id': list(range(12)),
+        **{metrica: list(range(12)) for metrica in METRICAS},
+    })
+
+    def mock_run_query(sql_query: str, params: dict = None, chunksize: int = None):
+        return (df_fake_db_return.iloc[i:i + chunksize].reset_index(drop=True)
+                for i in range(0, len(df_fake_db_return), chunksize))
+    monkeypatch.setattr('etl.etl.run_query', mock_run_query)
+    monkeypatch.setattr('etl.etl.TAMANHO_LOTE', 5)
+    monkeypatch.setattr('etl.etl.output_dir', tmp_path / "csv")
+
+    executar_etl("banco_de_teste", "2025-09-01", "2025-09-30")
+
+    # Resultado esperado: agregações e escrita como eram feitas com o pandas
+    df_pdv = df_fake_db_return.groupby(
+        ['rid', 'sid', 'grupo', 'marca', 'pdv'], as_index=False
+    )[list(METRICAS)].sum()
+    esperados = {
+        "visao_vendedor.csv": df_fake_db_return,
+        "visao_pdv.csv": df_pdv[list(ORDEM_PDV)],
+        "visao_regional.csv": df_pdv.groupby('rid', as_index=False)[list(METRICAS)].sum(),
+        "visao_setor.csv": df_pdv.groupby('sid', as_index=False)[list(METRICAS)].sum(),
+    }
+    pasta_esperada = tmp_path / "esperado"
+    pasta_esperada.mkdir()
+    for nome_arquivo, df_esperado in esperados.items():
+        encoding = 'utf-8-sig' if nome_arquivo in _BOM_VIEWS else 'utf-8'
+        df_esperado.to_csv(pasta_esperada / nome_arquivo, index=False, encoding=encoding)
+        assert (tmp_path / "csv" / nome_arquivo).read_bytes() == (pasta_esperada / nome_arquivo).read_bytes()
+    logging.info("Teste finalizado com sucesso.")
+
+def test_executar_etl_parquet_preserva_csvs(monkeypatch, tmp_path):
+    """
+    Verifica se o formato 'parquet' não apaga os CSVs já gravados e se o
+    relatório carrega do Parquet os mesmos dados que carregava dos CSVs.
+    """
+    logging.info("Iniciando teste: test_executar_etl_parquet_preserva_csvs")
+
+    df_fake_db_return = pd.DataFrame({
+        'nome_comercial': ['Vendedor 1', 'Vendedor 2', 'Vendedor 3'],
+        'rid': ['SUL', 'SUDESTE', 'SUL'], 'sid': [10, 20, 10],
+        'grupo': ['Grupo A', 'Grupo B', 'Grupo A'], 'marca': ['Marca X', 'Marca Y', 'Marca X'],
+        'pdv': ['PDV A', 'PDV B', 'PDV C'], 'prospector_id': [101, 202, 303],
+        **{metrica: [1, 2, 3] for metrica in METRICAS},
+    })
+    monkeypatch.setattr('etl.etl.run_query', lambda *args, **kwargs: iter([df_fake_db_return]))
+    monkeypatch.setattr('etl.etl.output_dir', tmp_path)
+    monkeypatch.setattr('report.build_report.DATA_DIR', tmp_path)
+
+    executar_etl("banco_de_teste", "2025-09-01", "2025-09-30", formato="csv")
+    dados_csv = carregar_dados()
+    assert not list(tmp_path.glob("*.parquet"))
+
+    executar_etl("banco_de_teste", "2025-09-01", "2025-09-30", formato="parquet")
+    assert (tmp_path / "visao_regional.csv").exists()
+    assert (tmp_path / "visao_regional.parquet").exists()
+    dados_parquet = carregar_dados()
+
+    for nome_visao in ("visao_pdv", "visao_regional", "visao_grupo", "visao_marca",
+                       "visao_setor", "visao_nacional"):
+        assert_frame_equal(dados_parquet[nome_visao], dados_csv[nome_visao])
+    logging.info("Teste finalizado com sucesso.")
+
+def test_agregacoes_iguais_a_groupby_por_visao(monkeypatch, tmp_path):
+    """
+    Verifica se as visões agregadas a partir da visão PDV (lida em vários
+    lotes) são iguais a um groupby independente sobre os dados de origem.
+    """
+    logging.info("Iniciando teste: test_agregacoes_iguais_a_groupby_por_visao")
+
+    df_fake_db_return = pd.DataFrame({
+        'nome_comercial': [f'Vendedor {i}' for i in range(20)],
+        'rid': ['SUL', 'NORTE', 'SUDESTE', 'SUL'] * 5, 'sid': [10, 20, 30, 40, 50] * 4,
+        'grupo': ['Grupo C', 'Grupo A', 'Grupo B'] * 6 + ['Grupo A', 'Grupo C'],
+        'marca': ['Marca Y', 'Marca X'] * 10,
+        'pdv': [f'PDV {i % 7}' for i in range(20)], 'prospector_id': list(range(20)),
+        **{metrica: [None if i % 6 == 0 else i for i in range(20)] for metrica in METRICAS},
+    })
+
+    def mock_run_query(sql_query: str, params: dict = None, chunksize: int = None):
+        return (df_fake_db_return.iloc[i:i + chunksize].reset_index(drop=True)
+                for i in range(0, len(df_fake_db_return), chunksize))
+    monkeypatch.setattr('etl.etl.run_query', mock_run_query)
+    monkeypatch.setattr('etl.etl.TAMANHO_LOTE', 3)
+    monkeypatch.setattr('etl.etl.output_dir', tmp_path)
+
+    executar_etl("banco_de_teste", "2025-09-01", "2025-09-30")
+
+    df_origem = df_fake_db_return.fillna({metrica: 0 for metrica in METRICAS})
+    df_origem[list(METRICAS)] = df_origem[list(METRICAS)].astype('int64')
+    for chaves, nome_arquivo in ((['rid'], 'visao_regional.csv'), (['grupo'], 'visao_grupo.csv'),
+                                 (['marca'], 'visao_marca.csv'), (['sid'], 'visao_setor.csv'),
+                                 (['rid', 'sid', 'grupo', 'marca', 'pdv'], 'visao_pdv.csv')):
+        df_gravado = pd.read_csv(tmp_path / nome_arquivo)[chaves + list(METRICAS)]
+        df_esperado = df_origem.groupby(chaves, as_index=False)[list(METRICAS)].sum()
+        assert_frame_equal(df_gravado, df_esperado, check_dtype=False)
+
+    df_nacional = pd.read_csv(tmp_path / "visao_nacional.csv")
+    assert df_nacional.iloc[0].tolist() == df_origem[list(METRICAS)].sum().tolist()
+    logging.info("Teste finalizado com sucesso.")
+
+def test_salvar_csv_quebra_de_linha_do_sistema(monkeypatch, tmp_path):
+    """
+    Verifica se _salvar_csv (PyArrow e fallback do pandas) usa a quebra de
+    linha configurada, inclusive a do Windows, e escreve o cabeçalho sem aspas.
+    """
+    logging.info("Iniciando teste: test_salvar_csv_quebra_de_linha_do_sistema")
+    df_simples = pd.DataFrame({'rid': ['SUL', None], 'venda': [1, 2]})
+    df_com_virgula = pd.DataFrame({'rid': ['SUL, RS', 'NORTE'], 'venda': [1, 2]})
+
+    for quebra_linha in ("\n", "\r\n"):
+        monkeypatch.setattr('etl.etl._QUEBRA_LINHA', quebra_linha)
+        for df in (df_simples, df_com_virgula):
+            caminho = tmp_path / "visao_regional.csv"
+            _salvar_csv(df.iloc[:1], caminho)
+            _salvar_csv(df.iloc[1:], caminho, anexar=True)
+            esperado = df.to_csv(index=False, lineterminator=quebra_linha).encode("utf-8")
+            assert caminho.read_bytes() == esperado
+    logging.info("Teste finalizado com sucesso.")
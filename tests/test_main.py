@@ -0,0 +1,121 @@
+# Arquivo: tests/test_main.py
+
+import logging
+import os
+import pandas as pd
+import pytest
+
+import main
+from etl import etl
+
+# --- Testes para converter_data_br_para_mysql ---
+def test_converter_data_br_para_mysql():
+    """Verifica a conversão dd/mm/aaaa -> YYYY-MM-DD e o cache das chamadas repetidas."""
+    logging.info("Executando teste: test_converter_data_br_para_mysql")
+    main.converter_data_br_para_mysql.cache_clear()
+    main._parse_br_fast.cache_clear()
+
+    assert main.converter_data_br_para_mysql('15/08/2024') == '2024-08-15'
+    assert main.converter_data_br_para_mysql('15/08/2024') == '2024-08-15'
+
+    assert main.converter_data_br_para_mysql.cache_info().hits == 1
+    assert main._parse_br_fast.cache_info().misses == 1
+
+def test_converter_data_br_para_mysql_data_invalida():
+    """Verifica se datas inválidas continuam gerando ValueError (erros não ficam em cache)."""
+    logging.info("Executando teste: test_converter_data_br_para_mysql_data_invalida")
+    for data_invalida in ('31/02/2024', '2024-08-15', '1/8/2024'):
+        with pytest.raises(ValueError):
+            main.converter_data_br_para_mysql(data_invalida)
+        with pytest.raises(ValueError):
+            main.converter_data_br_para_mysql(data_invalida)
+
+# --- Testes para get_eventos ---
+def test_get_eventos_relido_apenas_quando_o_arquivo_muda(monkeypatch, tmp_path):
+    """Verifica se o eventos_db.csv só é relido quando o seu mtime muda."""
+    logging.info("Executando teste: test_get_eventos_relido_apenas_quando_o_arquivo_muda")
+    monkeypatch.setattr(etl, 'CONFIG_DIR', tmp_path)
+    etl._ler_eventos.cache_clear()
+    arquivo = tmp_path / "eventos_db.csv"
+    colunas = "db_name,event_name,start_date,end_date\n"
+    arquivo.write_text(colunas + "evento_a,Evento A,01/08/2024,31/08/2024\n")
+
+    eventos = etl.get_eventos()
+    eventos[0]['event_name'] = 'Alterado pelo chamador'
+    assert etl.get_eventos()[0]['event_name'] == 'Evento A'
+    assert etl._ler_eventos.cache_info().misses == 1
+
+    arquivo.write_text(colunas + "evento_b,Evento B,01/09/2024,30/09/2024\n")
+    estado = arquivo.stat()
+    os.utime(arquivo, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000_000))
+    assert etl.get_eventos()[0]['db_name'] == 'evento_b'
+    assert etl._ler_eventos.cache_info().misses == 2
+
+# --- Testes para o estado EXECUTAR_ETL ---
+def test_executar_etl_pulado_com_mesmo_evento_e_periodo(monkeypatch):
+    """Verifica se o ETL só roda de novo quando o evento ou o período mudam."""
+    logging.info("Executando teste: test_executar_etl_pulado_com_mesmo_evento_e_periodo")
+    execucoes = []
+    monkeypatch.setattr(main, 'executar_etl', lambda **kwargs: execucoes.append(kwargs))
+    monkeypatch.setattr(main, 'carregar_dados', lambda: {'visao_nacional': pd.DataFrame()})
+
+    contexto = {
+        'evento': {'db_name': 'evento_a'},
+        'data_inicio_mysql': '2024-08-01',
+        'data_fim_mysql': '2024-08-31',
+    }
+    assert main._estado_executar_etl(contexto) == "SELECIONAR_TIPO_RELATORIO"
+    assert main._estado_executar_etl(contexto) == "SELECIONAR_TIPO_RELATORIO"
+    assert len(execucoes) == 1
+    assert contexto['chave_etl'] == ('evento_a', '2024-08-01', '2024-08-31')
+
+    contexto['data_fim_mysql'] = '2024-08-15'
+    main._estado_executar_etl(contexto)
+    assert len(execucoes) == 2
+    assert execucoes[-1]['data_fim'] == '2024-08-15'
+
+# --- Testes para _display_menu ---
+def test_display_menu_falha_sem_terminal(monkeypatch, capsys):
+    """Verifica se, sem terminal interativo, uma opção inválida falha em vez de repetir a pergunta."""
+    logging.info("Executando teste: test_display_menu_falha_sem_terminal")
+    monkeypatch.setattr(main, '_INTERACTIVE', False)
+    monkeypatch.setattr(main, '_clear_screen', lambda: None)
+    monkeypatch.setattr('builtins.input', lambda prompt='': '7')
+
+    with pytest.raises(ValueError, match="Opção inválida"):
+        main._display_menu("Selecione o Evento", ["Evento A", "Evento B"], special_option_zero="Sair")
+    assert "Opção inválida. Tente novamente." in capsys.readouterr().out
+
+def test_display_menu_repete_a_pergunta_sem_pausa(monkeypatch):
+    """Verifica se, no terminal, uma entrada inválida só repete a pergunta (sem pedir Enter)."""
+    logging.info("Executando teste: test_display_menu_repete_a_pergunta_sem_pausa")
+    monkeypatch.setattr(main, '_INTERACTIVE', True)
+    monkeypatch.setattr(main, '_clear_screen', lambda: None)
+    respostas = iter(['abc', '2'])
+    perguntas = []
+    def fake_input(prompt=''):
+        perguntas.append(prompt)
+        return next(respostas)
+    monkeypatch.setattr('builtins.input', fake_input)
+
+    assert main._display_menu("Selecione o Evento", ["Evento A", "Evento B"]) == 2
+    assert perguntas == ["\nDigite o número da sua escolha: "] * 2
+
+# --- Testes para o estado SELECIONAR_EVENTO ---
+def test_selecionar_evento_exibe_os_nomes(monkeypatch):
+    """Verifica se o menu de evento recebe os nomes dos eventos, não os registros."""
+    logging.info("Executando teste: test_selecionar_evento_exibe_os_nomes")
+    eventos = [{'db_name': 'evento_a', 'event_name': 'Evento A'},
+               {'db_name': 'evento_b', 'event_name': 'Evento B'}]
+    monkeypatch.setattr(main, 'get_eventos', lambda: eventos)
+    menus = []
+    def fake_display_menu(titulo, opcoes, special_option_zero=None, menu_renderizado=None):
+        menus.append((opcoes, menu_renderizado))
+        return 2
+    monkeypatch.setattr(main, '_display_menu', fake_display_menu)
+
+    contexto = {}
+    assert main._estado_selecionar_evento(contexto) == "SELECIONAR_DATAS"
+    assert contexto['evento'] == eventos[1]
+    assert menus == [(['Evento A', 'Evento B'],
+                      main._prerender_menu("Selecione o Evento", ['Evento A', 'Evento B'], "Sair"))]